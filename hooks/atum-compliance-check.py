@@ -4,6 +4,15 @@ ATUM Audit — Post-Commit compliance hook for Claude Code.
 
 Shows a brief compliance summary after every git commit.
 Only triggers on Bash commands containing "git commit".
+Directories the atum_fastpath index knows are untracked exit before
+atum_audit is imported. Counts come from the atum_summary file the journal
+compactor maintains; the agent is only consulted when it is stale. Each
+commit also compacts the journal and tags the project's Merkle root
+(atum_merkle) as "commit:<sha>", so later diffs can start from any commit;
+when a running compactor does not finish in time, the commit is reported
+as not anchored rather than tagged with a root that misses edits. A project
+without a tree yet has it built by a background seeder, which tags the
+commit once done.
 
 Hook type: PostToolUse, matcher: Bash
 Output: stdout (displayed to user in Claude Code)
@@ -14,6 +23,31 @@ import json
 import os
 import re
 import sys
+from pathlib import Path
+
+
+def _git_head(cwd):
+    """Commit sha HEAD points to, read from .git without spawning git."""
+    git_dir = Path(cwd) / ".git"
+    try:
+        if git_dir.is_file():  # Worktree / submodule: "gitdir: <path>"
+            git_dir = (Path(cwd) / git_dir.read_text(encoding="utf-8").split(":", 1)[1].strip()).resolve()
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[5:]
+        common = git_dir
+        if (git_dir / "commondir").is_file():
+            common = (git_dir / (git_dir / "commondir").read_text(encoding="utf-8").strip()).resolve()
+        ref_file = common / ref
+        if ref_file.is_file():
+            return ref_file.read_text(encoding="utf-8").strip()
+        for line in (common / "packed-refs").read_text(encoding="utf-8").splitlines():
+            if line.endswith(" " + ref):
+                return line.split(" ", 1)[0]
+    except (OSError, IndexError):
+        pass
+    return None
 
 
 def main():
@@ -29,43 +63,78 @@ def main():
     if not re.search(r"git\s+commit", command):
         return
 
+    from atum_fastpath import classify, remember
+
+    # Detect project from CWD (where git commit was run)
+    cwd = data.get("cwd", os.getcwd())
+    kind, path = classify(cwd)
+    if kind in ("none", "root"):
+        return  # Not an ATUM project — skip silently
+
     # Add ATUM library to path
     lib_dir = os.environ.get("ATUM_PROJECT_DIR", "")
     if lib_dir and lib_dir not in sys.path:
         sys.path.insert(0, lib_dir)
 
-    from atum_audit.discovery import find_config
-    from atum_audit.agent import AuditAgent
+    if kind == "config":
+        config_path = Path(path)
+    else:
+        from atum_audit.discovery import find_config
+        config_path = find_config(cwd)
+        if config_path is None:
+            remember(cwd, "root")  # Project-like but untracked
+            return  # Not an ATUM project — skip silently
+        remember(cwd, "config", config_path)
 
-    # Detect project from CWD (where git commit was run)
-    cwd = data.get("cwd", os.getcwd())
-    config_path = find_config(cwd)
-    if config_path is None:
-        return  # Not an ATUM project — skip silently
+    from atum_summary import load_summary, refresh_summary, retention_status
+
+    agents = []
 
-    agent = AuditAgent(str(config_path))
-    stats = agent.stats()
-    violations = agent.violations()
+    def get_agent():
+        if not agents:
+            from atum_audit.agent import AuditAgent
+            agents.append(AuditAgent(str(config_path)))
+        return agents[0]
+
+    # Anchor the commit to the tracked tree's Merkle root. Pending journal
+    # segments are compacted first (which also brings the summary up to date)
+    sha = _git_head(cwd)
+    merkle_root, deferred = None, False
+    if sha:
+        from atum_journal import anchor
+
+        merkle_root, deferred = anchor(config_path, f"commit:{sha}")
+
+    summary = load_summary(config_path)
+    if summary is None:
+        summary = refresh_summary(get_agent(), config_path)
     project_name = config_path.parent.name
 
     # Summary line
     print(
-        f"[ATUM:{project_name}] Tracked: {stats.get('tracked_files', 0)} files | "
-        f"Violations: {len(violations)} | "
-        f"AI systems: {stats.get('ai_systems', 0)}"
+        f"[ATUM:{project_name}] Tracked: {summary['tracked_files']} files | "
+        f"Violations: {summary['violation_count']} | "
+        f"AI systems: {summary['ai_systems']}"
     )
 
+    if merkle_root is not None:
+        print(f"[ATUM:{project_name}] Merkle root: {merkle_root[:16]} (commit {sha[:8]})")
+    elif deferred:
+        print(f"[ATUM:{project_name}] Merkle root: tree seeding in background (commit {sha[:8]} anchored once done)")
+    elif sha:
+        print(f"[ATUM:{project_name}] Merkle root: not anchored (journal still compacting, commit {sha[:8]})")
+
     # Show first few violations if any
-    if violations:
-        print(f"[ATUM:{project_name}] WARNING: {len(violations)} integrity violation(s)!")
-        for v in violations[:3]:
-            print(f"  - {v.get('path', 'unknown')}: {v.get('desc', '')}")
+    if summary["violation_count"]:
+        print(f"[ATUM:{project_name}] WARNING: {summary['violation_count']} integrity violation(s)!")
+        for v in summary["violations"]:
+            print(f"  - {v['path']}: {v['desc']}")
 
     # Retention check if AI systems exist
-    if stats.get("ai_systems", 0) > 0:
-        retention = agent.compliance.check_retention_compliance()
+    if summary["ai_systems"] > 0:
+        retention = retention_status(summary, config_path, get_agent)
         if not retention["all_ok"]:
-            count = len(retention["violations"])
+            count = retention["count"]
             print(f"[ATUM:{project_name}] WARNING: {count} retention issue(s) (Art. 12)")
 
 
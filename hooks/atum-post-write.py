@@ -5,12 +5,15 @@ ATUM Audit — Post-Write/Edit hook for Claude Code.
 Automatically hashes and registers files in the audit store
 after every Write or Edit operation by Claude.
 
+The hook only appends the event to the ATUM journal (see atum_journal.py);
+hashing, auto-init and store flushes happen in batches when the journal is
+compacted in the background or at Stop.
+
 Hook type: PostToolUse, matcher: Write|Edit
 Exit code: always 0 (never blocks Claude)
 """
 
 import json
-import os
 import sys
 from pathlib import Path
 
@@ -36,20 +39,23 @@ def main():
     if "audit_store" in str(fp):
         return
 
-    # Add ATUM library to path (for importing atum_audit package)
-    lib_dir = os.environ.get("ATUM_PROJECT_DIR", "")
-    if lib_dir and lib_dir not in sys.path:
-        sys.path.insert(0, lib_dir)
+    # Files outside any project never reach the journal
+    from atum_fastpath import classify, matcher_for
+
+    kind, config_path = classify(fp.parent)
+    if kind == "none":
+        return
 
-    from atum_audit.discovery import get_agent_for_path
+    # exclude_patterns (backups, node_modules, ...) are dropped before any heavier import
+    matcher = matcher_for(config_path if kind == "config" else None)
+    if matcher.excluded(str(fp)):
+        return
 
-    # Auto-detect project from file path (auto-init if needed)
-    agent = get_agent_for_path(fp, auto_init=True, lib_dir=lib_dir or None)
-    if agent is None:
-        return  # File not inside any detectable project
+    # Journal the event; the compactor resolves the project and flushes in batches
+    from atum_journal import append_event, schedule_compaction
 
-    agent.process_file_event(str(fp), "modified")
-    agent.flush()
+    append_event(str(fp), "modified", category=matcher.category(str(fp)))
+    schedule_compaction()
 
 
 if __name__ == "__main__":
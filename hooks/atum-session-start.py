@@ -5,6 +5,12 @@ ATUM Audit -- SessionStart hook for Claude Code.
 Auto-detects and initializes ATUM when Claude Code starts in a project.
 Outputs JSON additionalContext with ATUM status.
 
+Discovery goes through the atum_fastpath index first: known projects and
+non-project directories are answered without importing atum_audit.
+New projects are initialized through atum_scan, which bounds the time spent
+here and hands large baselines to a background worker. Tracked projects with
+`enable_watchdog` get an atum_watch inotify watcher.
+
 Hook type: SessionStart
 Exit code: always 0 (never blocks Claude)
 """
@@ -12,34 +18,67 @@ Exit code: always 0 (never blocks Claude)
 import json
 import os
 import sys
+from pathlib import Path
 
 
 def main():
-    # Add ATUM library to path
-    lib_dir = os.environ.get("ATUM_PROJECT_DIR", "")
-    if lib_dir and lib_dir not in sys.path:
-        sys.path.insert(0, lib_dir)
-
-    from atum_audit.discovery import find_config, find_project_root, auto_init_project
+    from atum_fastpath import classify, remember
 
     # Detect current working directory
     cwd = os.environ.get("PWD", os.getcwd())
 
-    # Check if already an ATUM project
-    config_path = find_config(cwd)
-    if config_path is not None:
+    # Indexed answer first: skip the atum_audit import when it can't matter
+    kind, path = classify(cwd)
+    if kind == "none":
+        return  # Not a project directory -- nothing to do
+
+    if kind == "config":
+        config_path = Path(path)
         project_name = config_path.parent.name
         context = f"[ATUM] Tracking project: {project_name} ({config_path.parent})"
     else:
-        # Try to find a project root and auto-init
-        project_root = find_project_root(cwd)
-        if project_root is not None:
-            config_path = auto_init_project(project_root, lib_dir=lib_dir or None)
-            project_name = project_root.name
-            context = f"[ATUM] Auto-initialized in: {project_name} ({project_root})"
+        # Add ATUM library to path
+        lib_dir = os.environ.get("ATUM_PROJECT_DIR", "")
+        if lib_dir and lib_dir not in sys.path:
+            sys.path.insert(0, lib_dir)
+
+        from atum_audit.discovery import find_config, find_project_root
+
+        # Check if already an ATUM project
+        config_path = find_config(cwd)
+        if config_path is not None:
+            remember(cwd, "config", config_path)
+            project_name = config_path.parent.name
+            context = f"[ATUM] Tracking project: {project_name} ({config_path.parent})"
         else:
-            # Not a project directory -- nothing to do
-            context = ""
+            # Try to find a project root and auto-init
+            project_root = find_project_root(cwd)
+            if project_root is not None:
+                # Time-budgeted baseline scan; large repos finish in the background
+                from atum_scan import start
+
+                status, config_path, hashed = start(project_root, lib_dir=lib_dir or None)
+                project_name = project_root.name
+                if status == "initialized":
+                    if config_path is not None:
+                        remember(cwd, "config", config_path)
+                    context = f"[ATUM] Auto-initialized in: {project_name} ({project_root})"
+                else:
+                    remember(cwd, "root", project_root)
+                    context = (
+                        f"[ATUM] Auto-initializing in: {project_name} ({project_root}) "
+                        f"-- baseline scan continues in background ({hashed} files hashed so far)"
+                    )
+            else:
+                # Not a project directory -- nothing to do
+                remember(cwd, "none")
+                context = ""
+
+    # inotify watcher instead of periodic rescans (enable_watchdog, Linux)
+    if config_path is not None:
+        from atum_watch import ensure_watcher
+
+        ensure_watcher(config_path)
 
     if context:
         output = {
@@ -0,0 +1,255 @@
+"""
+ATUM Audit — persistent project-discovery index for the hooks.
+
+`find_config`, `find_project_root` and `get_agent_for_path` walk up the
+directory tree on every hook event, and reaching them costs the import of
+the whole atum_audit package. This index remembers, per directory, what the
+walk found:
+
+    ("config", <path>)   inside a tracked project (config file found)
+    ("root", <path>)     inside an untracked project (auto-init candidate)
+    ("none", None)       not an ATUM project
+
+so hooks can exit for non-project directories before atum_audit is imported.
+
+Validity:
+  - "config" entries hold while the config file exists with the same mtime;
+  - "root"/"none" entries hold while the same config files and project
+    markers exist up the tree. Only those names are checked, not directory
+    mtimes: the Edit backup hook adds a `*.backup.*` file next to every
+    edited file, which would bump the directory on each event.
+
+Directories with no config and no project marker anywhere up the tree are
+classified here without the library. Everything else that is not yet
+indexed comes back as ("unknown", None); the caller asks atum_audit and
+records the answer with remember().
+
+The same module holds the per-config path matcher (`matcher_for`): all
+`exclude_patterns` compiled into one regex plus an extension -> category
+dict from `file_categories`, stored in the same index file (one "matcher"
+entry per config, valid while the config mtime holds). Hooks run it before
+importing anything heavier, so excluded events (`*.backup.*` files from
+the Edit backup hook, node_modules, ...) are dropped right away.
+
+Index file: ~/.claude/cache/atum/discovery-index.json
+"""
+
+import json
+import os
+import re
+import time
+
+from hook_util import write_json
+
+INDEX_FILE = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum", "discovery-index.json")
+CONFIG_NAME = os.environ.get("ATUM_CONFIG_NAME", "atum-audit.config.json")
+PROJECT_MARKERS = {
+    ".git", "package.json", "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt",
+    "Cargo.toml", "go.mod", "pom.xml", "build.gradle", "build.gradle.kts", "composer.json",
+    "Gemfile", "pubspec.yaml", "deno.json", "CMakeLists.txt", "Makefile",
+}
+MAX_ENTRIES = 2000
+# Same exclusions as the atum-audit.config.json template; used before a project has a config
+DEFAULT_EXCLUDES = [
+    "**/.git/**", "**/__pycache__/**", "**/node_modules/**", "**/.venv/**", "**/venv/**",
+    "**/.DS_Store", "**/Thumbs.db", "**/*.pyc", "**/audit_store/**", "**/*.backup.*", "*.backup.*",
+]
+
+_index = None
+_matchers = {}
+
+
+def _load():
+    global _index
+    if _index is None:
+        try:
+            with open(INDEX_FILE, "r", encoding="utf-8") as f:
+                _index = json.load(f)
+        except (OSError, ValueError):
+            _index = {}
+    return _index
+
+
+def _save():
+    index = _load()
+    if len(index) > MAX_ENTRIES:
+        for key in sorted(index, key=lambda k: index[k].get("at", 0))[: len(index) - MAX_ENTRIES]:
+            del index[key]
+    try:
+        write_json(INDEX_FILE, index)
+    except OSError:
+        pass  # Index is best-effort
+
+
+def _ancestors(directory):
+    directory = os.path.abspath(directory)
+    while True:
+        yield directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _markers(directory):
+    """Config files and project markers present in `directory` and its ancestors."""
+    names = (CONFIG_NAME, *sorted(PROJECT_MARKERS))
+    return [
+        os.path.join(d, name) for d in _ancestors(directory) for name in names
+        if os.path.lexists(os.path.join(d, name))
+    ]
+
+
+def _valid(entry, directory):
+    if entry["kind"] == "config":
+        return _mtime(entry["path"]) == entry["mtime"]
+    return entry.get("markers") == _markers(directory)
+
+
+def remember(directory, kind, path=None):
+    """Record the answer for `directory` (kind: "config", "root" or "none")."""
+    directory = os.path.abspath(str(directory))
+    entry = {"kind": kind, "path": str(path) if path is not None else None, "at": time.time()}
+    if kind == "config":
+        entry["mtime"] = _mtime(entry["path"])
+    else:
+        entry["markers"] = _markers(directory)
+    _load()[directory] = entry
+    _save()
+
+
+def classify(directory):
+    """(kind, path) for `directory`; kind is "config", "root", "none" or "unknown"."""
+    directory = os.path.abspath(str(directory))
+    entry = _load().get(directory)
+    if entry and _valid(entry, directory):
+        return entry["kind"], entry["path"]
+
+    has_marker = False
+    for ancestor in _ancestors(directory):
+        try:
+            names = set(os.listdir(ancestor))
+        except OSError:
+            continue
+        if CONFIG_NAME in names:
+            config = os.path.join(ancestor, CONFIG_NAME)
+            remember(directory, "config", config)
+            return "config", config
+        has_marker = has_marker or bool(names & PROJECT_MARKERS)
+
+    if not has_marker:
+        remember(directory, "none")
+        return "none", None
+    return "unknown", None  # Project-like: let atum_audit decide the root
+
+
+def _glob_to_regex(pattern):
+    pattern = pattern.replace("\\", "/")
+    if "/" not in pattern:
+        pattern = "**/" + pattern  # Bare patterns match at any depth
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("(?:/.*)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def glob_source(patterns):
+    """Regex source matching any of `exclude_patterns` (relative posix paths)."""
+    if not patterns:
+        return r"(?!)"
+    return "^(?:" + "|".join(_glob_to_regex(p) for p in patterns) + ")$"
+
+
+def compile_globs(patterns):
+    """One compiled regex for a list of `exclude_patterns`; match() takes a relative posix path."""
+    return re.compile(glob_source(patterns))
+
+
+class Matcher:
+    """Compiled `exclude_patterns` + `file_categories` of one config."""
+
+    __slots__ = ("root", "source", "regex", "extensions")
+
+    def __init__(self, root, source, extensions):
+        self.root = root
+        self.source = source
+        self.regex = re.compile(source)
+        self.extensions = extensions
+
+    @classmethod
+    def from_config(cls, root, patterns, categories):
+        extensions = {
+            ext.lower(): category for category, exts in (categories or {}).items() for ext in exts
+        }
+        return cls(root, glob_source(patterns), extensions)
+
+    def excluded(self, path):
+        rel = os.path.relpath(path, self.root).replace(os.sep, "/")
+        if rel == "." or rel.startswith("../"):
+            return False
+        return self.regex.match(rel) is not None
+
+    def category(self, path):
+        return self.extensions.get(os.path.splitext(path)[1].lower())
+
+
+def matcher_for(config_path):
+    """
+    Matcher for a config file. The regex source and extension map are kept
+    in the index next to the discovery entries (keyed by config path, valid
+    while the config mtime is unchanged), so a new hook process neither
+    parses the config nor translates the globs again.
+    """
+    key = str(config_path) if config_path is not None else None
+    mtime = _mtime(key) if key is not None else None
+    cached = _matchers.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    if key is None:
+        matcher = Matcher.from_config(os.path.abspath(os.sep), DEFAULT_EXCLUDES, {})
+    else:
+        root = os.path.dirname(os.path.abspath(key))
+        entry = _load().get(key)
+        if entry is not None and entry.get("kind") == "matcher" and entry["mtime"] == mtime:
+            matcher = Matcher(root, entry["regex"], entry["extensions"])
+        else:
+            try:
+                with open(key, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                config = {}
+            matcher = Matcher.from_config(
+                root, config.get("exclude_patterns", DEFAULT_EXCLUDES), config.get("file_categories"),
+            )
+            if mtime is not None:
+                _load()[key] = {
+                    "kind": "matcher", "path": key, "mtime": mtime, "at": time.time(),
+                    "regex": matcher.source, "extensions": matcher.extensions,
+                }
+                _save()
+    _matchers[key] = (mtime, matcher)
+    return matcher
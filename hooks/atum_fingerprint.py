@@ -0,0 +1,161 @@
+"""
+ATUM Audit — stat fingerprints and streaming content digests.
+
+The journal compactor asks this module whether a file event carries new
+content before handing it to the audit agent, which rehashes from scratch:
+
+  1. (size, mtime_ns, inode) equal to the last recorded fingerprint
+     -> unchanged, no read at all;
+  2. otherwise the file is hashed once, read in fixed chunks into one
+     reused buffer (constant memory, and a file truncated mid-read just
+     ends early instead of faulting like an mmap would), feeding every
+     configured algorithm in the same pass (`dual_hash`);
+  3. digest equal to the recorded one (touch, checkout of the same blob)
+     -> fingerprint refreshed, event dropped.
+
+When the installed atum_audit accepts a precomputed digest (a `digest`
+keyword, see `digest_kwargs`), the digest is handed over so the library
+does not read the file a second time. The baseline scan (atum_scan) does the
+same for `auto_init_project` through a `digests` keyword.
+
+Store: ~/.claude/cache/atum/fingerprints.db (SQLite, WAL), one row per path
+and project config.
+"""
+
+import hashlib
+import inspect
+import os
+import sqlite3
+
+STORE_FILE = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum", "fingerprints.db")
+CHUNK_SIZE = 1 << 20  # 1 MiB
+DEFAULT_ALGORITHM = "sha256"
+# Second digest when dual_hash is on: a different construction than the first
+DUAL_ALGORITHMS = {"sha256": "sha3_256", "sha3_256": "sha256"}
+
+
+def algorithms(config):
+    """Digest algorithms for a project config dict, primary first."""
+    primary = config.get("hash_algorithm") or DEFAULT_ALGORITHM
+    if not config.get("dual_hash"):
+        return [primary]
+    return [primary, DUAL_ALGORITHMS.get(primary, "sha3_256")]
+
+
+def stat_key(st):
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+def hash_file(path, algos, chunk_size=CHUNK_SIZE):
+    """One read pass over `path`, updating every hasher per chunk; returns 'algo:hex,...'."""
+    hashers = [hashlib.new(a) for a in algos]
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            chunk = view[:n]
+            for h in hashers:
+                h.update(chunk)
+    return ",".join(f"{a}:{h.hexdigest()}" for a, h in zip(algos, hashers))
+
+
+_accepts = {}
+
+
+def accepts_keyword(func, name):
+    """True if `func` (an atum_audit entry point) takes a `name` keyword."""
+    key = (getattr(func, "__func__", func), name)  # One lookup per method, not per bound agent
+    if key not in _accepts:
+        try:
+            params = inspect.signature(func).parameters
+            _accepts[key] = name in params or any(
+                p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values())
+        except (TypeError, ValueError):
+            _accepts[key] = False
+    return _accepts[key]
+
+
+def digest_kwargs(func, digest):
+    """{"digest": digest} if `func` takes a precomputed digest."""
+    if digest is None or not accepts_keyword(func, "digest"):
+        return {}
+    return {"digest": digest}
+
+
+class FingerprintStore:
+    """Last seen (size, mtime_ns, inode, digest) per (config, path)."""
+
+    def __init__(self, path=STORE_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " config TEXT NOT NULL, path TEXT NOT NULL,"
+            " size INTEGER, mtime_ns INTEGER, inode INTEGER, digest TEXT,"
+            " PRIMARY KEY (config, path))"
+        )
+
+    def get(self, config, path):
+        return self.conn.execute(
+            "SELECT size, mtime_ns, inode, digest FROM files WHERE config = ? AND path = ?",
+            (config, path),
+        ).fetchone()
+
+    def put(self, config, path, key, digest):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", (config, path, *key, digest)
+        )
+
+    def paths_under(self, config, prefix):
+        """Recorded paths of `config` that start with `prefix` (a directory + separator)."""
+        rows = self.conn.execute(
+            "SELECT path FROM files WHERE config = ? AND path >= ? AND path < ?",
+            (config, prefix, prefix + "\uffff"),
+        )
+        return [row[0] for row in rows]
+
+    def digests_under(self, config, prefix):
+        """{path: digest} of every hashed file of `config` under `prefix`."""
+        rows = self.conn.execute(
+            "SELECT path, digest FROM files WHERE config = ? AND path >= ? AND path < ? AND digest IS NOT NULL",
+            (config, prefix, prefix + "\uffff"),
+        )
+        return dict(rows.fetchall())
+
+    def forget(self, config, path):
+        self.conn.execute("DELETE FROM files WHERE config = ? AND path = ?", (config, path))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()  # Uncommitted rows (batch not flushed) are dropped
+
+    def content_changed(self, config, path, project_config):
+        """
+        Truthy if `path` must go to the agent: its new digest when it was hashed
+        here, True when it was not (gone, over the size limit, unreadable).
+        Records the new fingerprint either way.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.forget(config, path)
+            return True  # Gone between event and replay: let the agent decide
+        key = stat_key(st)
+        row = self.get(config, path)
+        if row is not None and tuple(row[:3]) == key:
+            return False
+        max_size = project_config.get("max_file_size_bytes")
+        if max_size and st.st_size > max_size:
+            return True  # Agent applies its own size policy
+        try:
+            digest = hash_file(path, algorithms(project_config))
+        except (OSError, ValueError):
+            return True
+        self.put(config, path, key, digest)
+        return digest if row is None or row[3] != digest else False
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+ATUM Audit — append-only event journal for the Write/Edit hook.
+
+atum-post-write.py appends one JSON line per file event (a single O_APPEND
+write, no atum_audit import, no store flush). The compactor replays the
+journal into each project's audit store in batches of the project's
+`compact_after_events` setting, calling `agent.flush()` once per batch
+instead of once per edit. Events whose content did not change (same stat
+fingerprint or same digest, see atum_fingerprint) never reach the agent.
+Each flushed batch is folded into the project's atum_summary so the
+post-commit check does not have to scan the store; only a project whose
+summary was missing or stale, or which has no Merkle tree yet, is
+recomputed from the agent once at the end of the run. Replayed events are
+counted into a per-day index (atum_retention) that tells the post-commit
+check when the retention cutoff can have moved past records. Content
+changes also update the project's Merkle tree (atum_merkle) along the
+changed paths only. A project without a tree is never hashed here: its
+first tree comes from the background seeder (atum_scan --seed), installed
+by `install_tree()` under the compactor lock, and the commit anchors
+requested meanwhile are taken then.
+Untracked projects are auto-initialized through atum_scan under its
+per-root lock; while a project's baseline scan is still running in the
+background, replay stops at that project's first event and the scan
+worker compacts again once the project is initialized.
+
+Compaction runs debounced in the background (via hook_debounce, after a quiet
+window) and at the latest from the Stop hook:
+
+    python atum_journal.py --compact
+
+Crash safety:
+  - the live journal is claimed by atomic rename into a numbered segment,
+    so hooks never append to a file that is being replayed. Appenders hold
+    a shared flock on the journal while writing and the claim takes an
+    exclusive one around the rename; an appender that locked an inode which
+    is no longer journal.jsonl reopens and retries, so no write can land in
+    a segment after it was read (on Windows, renaming an open file fails and
+    the claim waits for the next run);
+  - the segment is fsynced before replay, and a checkpoint (segment, line)
+    is written + fsynced after every flushed batch;
+  - a compactor that dies mid-segment leaves the segment and checkpoint in
+    place; the next run resumes from the checkpoint. Replaying an event
+    twice is harmless (the agent rehashes the file's current content).
+  - a torn last line (crash during append) is skipped.
+
+Journal dir: ~/.claude/cache/atum/
+"""
+
+import json
+import os
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: the journal cannot be renamed while a hook holds it open
+    fcntl = None
+
+from hook_util import acquire_lock, release_lock, write_json
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum")
+JOURNAL_FILE = os.path.join(JOURNAL_DIR, "journal.jsonl")
+CHECKPOINT_FILE = os.path.join(JOURNAL_DIR, "checkpoint.json")
+ANCHORS_FILE = os.path.join(JOURNAL_DIR, "anchors.json")  # Labels waiting for a project's first tree
+COMPACTOR_LOCK = os.path.join(JOURNAL_DIR, "compactor.lock")
+SEGMENT_PREFIX = "segment-"
+COMPACT_QUIET_SECONDS = 30
+ANCHOR_WAIT_SECONDS = 5  # Post-commit: how long to wait for a compactor already running
+DEFAULT_COMPACT_AFTER_EVENTS = 10000
+STALE_LOCK_SECONDS = 600
+
+
+# ============================================================
+# APPEND (hook side — must stay in the microsecond range)
+# ============================================================
+def append_event(path, event="modified", category=None):
+    """Append one event line; a single write() on an O_APPEND fd is atomic."""
+    try:
+        st = os.stat(path)
+        size, mtime_ns = st.st_size, st.st_mtime_ns
+    except OSError:
+        size, mtime_ns = None, None
+    record = {
+        "path": path,
+        "event": event,
+        "ts": time.time(),
+        "size": size,
+        "mtime_ns": mtime_ns,
+    }
+    if category:
+        record["category"] = category
+    data = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+    while True:
+        try:
+            fd = os.open(JOURNAL_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        except FileNotFoundError:
+            os.makedirs(JOURNAL_DIR, exist_ok=True)
+            continue
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                try:
+                    current = os.stat(JOURNAL_FILE).st_ino
+                except FileNotFoundError:
+                    current = None
+                if current != os.fstat(fd).st_ino:
+                    continue  # Claimed between open() and flock(): append to the new journal
+            os.write(fd, data)
+            return
+        finally:
+            os.close(fd)  # Also drops the lock
+
+
+def schedule_compaction():
+    """Debounced background compaction; the Stop hook compacts whatever is left."""
+    import hook_debounce
+    if not hook_debounce.enabled():
+        return
+    hook_debounce.enqueue(
+        "atum-journal", "compact",
+        [sys.executable, os.path.abspath(__file__), "--compact"], "",
+        window=COMPACT_QUIET_SECONDS,
+    )
+
+
+# ============================================================
+# COMPACT (background / Stop side)
+# ============================================================
+def _fsync_dir(path):
+    if os.name == "nt":
+        return  # Directory fsync is not supported on Windows
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _claim_journal():
+    """Rename the live journal into the next numbered segment (atomic).
+
+    The exclusive flock waits out in-flight appends; appenders that opened
+    the old inode re-check it after locking and move to the new journal.
+    """
+    segment = os.path.join(JOURNAL_DIR, f"{SEGMENT_PREFIX}{time.time_ns():020d}.jsonl")
+    if fcntl is None:
+        try:
+            os.replace(JOURNAL_FILE, segment)
+        except FileNotFoundError:
+            return
+        except PermissionError:
+            return  # A hook has it open; claimed on the next run
+        fd = os.open(segment, os.O_RDONLY)
+    else:
+        try:
+            fd = os.open(JOURNAL_FILE, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        os.replace(JOURNAL_FILE, segment)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)  # Also drops the lock
+    _fsync_dir(JOURNAL_DIR)
+
+
+def _segments():
+    return sorted(
+        os.path.join(JOURNAL_DIR, name) for name in os.listdir(JOURNAL_DIR)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(".jsonl")
+    )
+
+
+def _read_checkpoint():
+    try:
+        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_checkpoint(segment, line_no):
+    write_json(CHECKPOINT_FILE, {"segment": os.path.basename(segment), "line": line_no}, fsync=True)
+    _fsync_dir(JOURNAL_DIR)
+
+
+def _read_events(segment, start_line):
+    events = []
+    with open(segment, "r", encoding="utf-8", errors="replace") as f:
+        for line_no, line in enumerate(f, 1):
+            if line_no <= start_line:
+                continue
+            try:
+                events.append((line_no, json.loads(line)))
+            except ValueError:
+                continue  # Torn write from a crash mid-append
+    return events
+
+
+class _ScanPending(Exception):
+    """A baseline scan of the project is still running: replay its events later."""
+
+
+class _Projects:
+    """Resolve file paths to (config path, agent), one agent per project."""
+
+    def __init__(self, lib_dir):
+        from atum_audit.discovery import find_config, find_project_root
+        from atum_audit.agent import AuditAgent
+        self._find_config = find_config
+        self._find_project_root = find_project_root
+        self._agent_cls = AuditAgent
+        self.lib_dir = lib_dir
+        self.by_dir = {}
+        self.agents = {}
+
+    def resolve(self, path):
+        directory = os.path.dirname(path)
+        if directory not in self.by_dir:
+            from atum_fastpath import remember
+            config = self._find_config(directory)
+            if config is None:
+                # Auto-init through the baseline scan, under its per-root lock
+                root = self._find_project_root(directory)
+                if root is not None:
+                    from atum_scan import start
+                    status, config, _ = start(root, lib_dir=self.lib_dir)
+                    if status != "initialized":
+                        raise _ScanPending(root)  # The worker compacts once it is done
+            # Feed the hooks' discovery index so later events skip the walk
+            remember(directory, "config" if config is not None else "none", config)
+            self.by_dir[directory] = str(config) if config is not None else None
+        config = self.by_dir[directory]
+        if config is None:
+            return None, None
+        if config not in self.agents:
+            self.agents[config] = self._agent_cls(config)
+        return config, self.agents[config]
+
+
+_configs = {}
+
+
+def _project_config(config_path):
+    if config_path not in _configs:
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                _configs[config_path] = json.load(f)
+        except (OSError, ValueError):
+            _configs[config_path] = {}
+    return _configs[config_path]
+
+
+def _batch_size(config_path):
+    try:
+        return max(1, int(_project_config(config_path).get("compact_after_events", DEFAULT_COMPACT_AFTER_EVENTS)))
+    except (ValueError, TypeError):
+        return DEFAULT_COMPACT_AFTER_EVENTS
+
+
+def _replay_segment(segment, start_line, projects, fingerprints, merkle, stale):
+    """
+    Replay one segment in batches; checkpoint after each flushed batch.
+    Configs whose summary could not be updated incrementally are added to
+    `stale`. Returns False when it stopped early at a project still being
+    scanned.
+    """
+    from atum_fingerprint import digest_kwargs
+    from atum_retention import add_events
+    from atum_scan import start_seed
+    from atum_summary import apply_batch, load_summary
+    events = _read_events(segment, start_line)
+    pending = {}  # config -> {path: (line_no, record)}; last event per path wins
+    last_line = start_line
+
+    def flush_batch(upto_line):
+        for config, batch in pending.items():
+            agent = projects.agents[config]
+            summary = load_summary(config)  # Before this batch touches the store
+            records = [record for _, record in batch.values()]
+            changes = {}  # path -> new digest, None when removed
+            for record in records:
+                path = record["path"]
+                if record["event"] == "deleted":
+                    fingerprints.forget(config, path)
+                    agent.process_file_event(path, "deleted")
+                    changes[path] = None
+                elif os.path.exists(path):
+                    changed = fingerprints.content_changed(config, path, _project_config(config))
+                    if not changed:
+                        continue
+                    digest = changed if isinstance(changed, str) else None
+                    # Hand the digest over when the library takes one: no second read
+                    agent.process_file_event(path, record["event"], **digest_kwargs(agent.process_file_event, digest))
+                    if digest is not None:
+                        changes[path] = digest
+            agent.flush()
+            add_events(config, records)
+            tracked = 0
+            if merkle.head(config) is None:
+                # The seeder's tree reflects the files as they are once it finishes
+                if config not in stale:
+                    start_seed(config)
+                tracked = None
+            elif changes:
+                _, tracked = merkle.update(config, os.path.dirname(config), changes)
+            if summary is None or tracked is None:
+                stale.add(config)
+            else:
+                apply_batch(config, summary, tracked)
+        # Fingerprints and tree become durable only once the agent has flushed
+        fingerprints.commit()
+        merkle.conn.commit()
+        pending.clear()
+        _write_checkpoint(segment, upto_line)
+
+    for line_no, record in events:
+        path = record.get("path")
+        if not path:
+            last_line = line_no
+            continue
+        try:
+            config, _ = projects.resolve(path)
+        except _ScanPending:
+            flush_batch(last_line)  # Stop here; the next compaction resumes from this line
+            return False
+        last_line = line_no
+        if config is None:
+            continue
+        batch = pending.setdefault(config, {})
+        batch[path] = (line_no, record)
+        if len(batch) >= _batch_size(config):
+            flush_batch(line_no)
+    flush_batch(last_line)
+    return True
+
+
+def _lock_compactor(wait):
+    """Take the compactor lock, waiting up to `wait` seconds (None: as long as it takes)."""
+    deadline = None if wait is None else time.monotonic() + wait
+    while not acquire_lock(COMPACTOR_LOCK, STALE_LOCK_SECONDS):
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def _compact_locked():
+    """compact() body; the caller holds the compactor lock."""
+    lib_dir = os.environ.get("ATUM_PROJECT_DIR", "")
+    if lib_dir and lib_dir not in sys.path:
+        sys.path.insert(0, lib_dir)
+    _claim_journal()
+    segments = _segments()
+    if not segments:
+        return True
+    from atum_fingerprint import FingerprintStore
+    from atum_merkle import MerkleStore
+    projects = _Projects(lib_dir or None)
+    fingerprints = FingerprintStore()
+    merkle = MerkleStore()
+    checkpoint = _read_checkpoint()
+    complete = True
+    stale = set()
+    try:
+        for segment in segments:
+            start = checkpoint.get("line", 0) if checkpoint.get("segment") == os.path.basename(segment) else 0
+            if not _replay_segment(segment, start, projects, fingerprints, merkle, stale):
+                complete = False  # Segment and checkpoint stay for the scan worker's compaction
+                break
+            os.remove(segment)
+            _fsync_dir(JOURNAL_DIR)
+        merkle.prune()  # Ancestor chains the replayed batches replaced
+    finally:
+        fingerprints.close()
+        merkle.conn.close()
+    from atum_summary import refresh_summary
+    for config in stale:
+        try:
+            refresh_summary(projects.agents[config], config)
+        except Exception as e:
+            print(f"[ATUM] WARNING: summary refresh failed for {config} — {e}", file=sys.stderr)
+    if complete:
+        try:
+            os.remove(CHECKPOINT_FILE)
+        except OSError:
+            pass
+    return complete
+
+
+def compact(wait=0):
+    """
+    Replay every pending segment (and the live journal) into the audit stores.
+    Waits up to `wait` seconds for a running compactor. Returns True when
+    everything journaled so far has been replayed.
+    """
+    if not os.path.isdir(JOURNAL_DIR):
+        return True
+    if not _lock_compactor(wait):
+        return False
+    try:
+        return _compact_locked()
+    finally:
+        release_lock(COMPACTOR_LOCK)
+
+
+def _read_anchors():
+    try:
+        with open(ANCHORS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def anchor(config_path, label, wait=ANCHOR_WAIT_SECONDS):
+    """
+    Compact, then name the project's Merkle root `label` (e.g. "commit:<sha>").
+    Returns (root, deferred). root is None when the journal could not be
+    fully replayed in time (a root that misses journaled edits anchors
+    nothing), or when the project has no tree yet: then `label` is queued,
+    the background seeder is started and takes the snapshot once the tree
+    is built (deferred=True). Never hashes the tracked set itself.
+    """
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    if not _lock_compactor(wait):
+        return None, False
+    try:
+        if not _compact_locked():
+            return None, False
+        from atum_merkle import MerkleStore
+        config_path = str(config_path)
+        merkle = MerkleStore()
+        try:
+            if merkle.head(config_path) is not None:
+                return merkle.snapshot(config_path, label), False
+        finally:
+            merkle.close()
+        # Queued under the lock: install_tree() reads the queue under it too
+        anchors = _read_anchors()
+        labels = anchors.setdefault(config_path, [])
+        if label not in labels:
+            labels.append(label)
+        write_json(ANCHORS_FILE, anchors)
+        from atum_scan import start_seed
+        return None, start_seed(config_path)
+    finally:
+        release_lock(COMPACTOR_LOCK)
+
+
+def install_tree(config_path, build):
+    """
+    Seeder side: install the project's first Merkle tree from `build()`
+    ({path: digest}, evaluated under the compactor lock so no batch is
+    replayed against a half-built tree) and take the snapshots anchor()
+    queued for it. Edits journaled before the tree existed replay onto it
+    later as ordinary updates.
+    """
+    from atum_merkle import MerkleStore
+    config_path = str(config_path)
+    os.makedirs(JOURNAL_DIR, exist_ok=True)
+    _lock_compactor(None)
+    try:
+        merkle = MerkleStore()
+        try:
+            if merkle.head(config_path) is None:
+                merkle.rebuild(config_path, os.path.dirname(config_path), build())
+                merkle.conn.commit()
+            anchors = _read_anchors()
+            for label in anchors.pop(config_path, []):
+                merkle.snapshot(config_path, label)
+            write_json(ANCHORS_FILE, anchors)
+            merkle.prune(force=True)
+        finally:
+            merkle.close()
+    finally:
+        release_lock(COMPACTOR_LOCK)
+
+
+if __name__ == "__main__":
+    try:
+        if "--compact" in sys.argv:
+            compact()
+    except ImportError as e:
+        print(f"[ATUM] WARNING: import failed — {e}. Check ATUM_PROJECT_DIR.", file=sys.stderr)
+    except Exception as e:
+        print(f"[ATUM] WARNING: journal compaction error — {e}", file=sys.stderr)
+    sys.exit(0)
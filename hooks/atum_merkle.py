@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+ATUM Audit — incremental Merkle tree over tracked file digests.
+
+Every tracked project gets a directory-structured Merkle tree whose leaves
+are the content digests of the fingerprint store (atum_fingerprint). Nodes
+are content-addressed (sha256 of the node body) and shared between
+versions, so:
+
+  - the journal compactor updates the tree after each flushed batch by
+    rewriting only the changed leaves' ancestor chains: O(changes x depth);
+  - the first tree of a project covers every tracked file; a background
+    seeder (atum_scan --seed) walks the project, reusing fingerprints that
+    still match, and installs it through atum_journal.install_tree();
+  - a snapshot is just a named root hash ("commit:<sha>" on every git
+    commit, via atum_journal.anchor(), which compacts pending journal
+    segments first);
+  - nodes that no head or snapshot reaches any more (the ancestor chains
+    later batches rewrote) are swept by `prune()` once the node table has
+    grown PRUNE_GROWTH-fold since the last sweep;
+  - diffing two roots descends only into subtrees whose hashes differ;
+  - the root hash anchors compliance reports: one value commits to the
+    whole tracked tree.
+
+Store: ~/.claude/cache/atum/merkle.db (SQLite, WAL)
+
+    python atum_merkle.py --root  <config>
+    python atum_merkle.py --diff  <config> <from> [<to>]   (label, root hash or "head")
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+STORE_FILE = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum", "merkle.db")
+EMPTY_TREE = hashlib.sha256(b"[]").hexdigest()
+PRUNE_GROWTH = 2  # Sweep once the node table has doubled since the last sweep
+
+
+def leaf_hash(digest):
+    return hashlib.sha256(("blob " + digest).encode("utf-8")).hexdigest()
+
+
+class MerkleStore:
+    def __init__(self, path=STORE_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS nodes (hash TEXT PRIMARY KEY, body TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS heads (config TEXT PRIMARY KEY, root TEXT NOT NULL, updated_at REAL);"
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " config TEXT NOT NULL, label TEXT NOT NULL, root TEXT NOT NULL, created_at REAL,"
+            " PRIMARY KEY (config, label));"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);"
+        )
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    # -- nodes ------------------------------------------------------
+    def _entries(self, node_hash):
+        """{name: (kind, hash)} of a tree node ('t' subtree, 'b' file leaf)."""
+        if node_hash is None or node_hash == EMPTY_TREE:
+            return {}
+        row = self.conn.execute("SELECT body FROM nodes WHERE hash = ?", (node_hash,)).fetchone()
+        if row is None:
+            return {}
+        return {name: (kind, h) for name, kind, h in json.loads(row[0])}
+
+    def _put_tree(self, entries):
+        body = json.dumps(sorted([name, kind, h] for name, (kind, h) in entries.items()), separators=(",", ":"))
+        node_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        self.conn.execute("INSERT OR IGNORE INTO nodes VALUES (?, ?)", (node_hash, body))
+        return node_hash
+
+    # -- heads / snapshots -------------------------------------------
+    def head(self, config):
+        row = self.conn.execute("SELECT root FROM heads WHERE config = ?", (config,)).fetchone()
+        return row[0] if row else None
+
+    def _set_head(self, config, root):
+        self.conn.execute("INSERT OR REPLACE INTO heads VALUES (?, ?, ?)", (config, root, time.time()))
+
+    def snapshot(self, config, label):
+        """Name the current root (e.g. "commit:<sha>"); returns it."""
+        root = self.head(config) or EMPTY_TREE
+        self.conn.execute(
+            "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)", (config, label, root, time.time())
+        )
+        self.conn.commit()
+        return root
+
+    def resolve(self, config, ref):
+        """Root hash for a label, "head", or a root hash."""
+        if ref == "head":
+            return self.head(config) or EMPTY_TREE
+        row = self.conn.execute(
+            "SELECT root FROM snapshots WHERE config = ? AND label = ?", (config, ref)
+        ).fetchone()
+        return row[0] if row else ref
+
+    # -- updates -----------------------------------------------------
+    def update(self, config, project_root, changes):
+        """
+        Apply {absolute path: digest or None (removed)}; rewrites only the
+        changed paths' ancestor directories. Returns (new root hash, number
+        of files added minus files removed).
+        """
+        dirs = {(): self._entries(self.head(config))}
+        added = 0
+
+        def load(parts):
+            if parts not in dirs:
+                parent = load(parts[:-1])
+                kind, node_hash = parent.get(parts[-1], ("t", None))
+                dirs[parts] = self._entries(node_hash) if kind == "t" else {}
+            return dirs[parts]
+
+        for path, digest in changes.items():
+            rel = os.path.relpath(path, project_root)
+            if rel.startswith(".."):
+                continue
+            parts = tuple(rel.replace(os.sep, "/").split("/"))
+            entries = load(parts[:-1])
+            if digest is None:
+                added -= entries.pop(parts[-1], None) is not None
+            else:
+                added += parts[-1] not in entries
+                entries[parts[-1]] = ("b", leaf_hash(digest))
+
+        # Re-hash dirty directories bottom-up
+        for parts in sorted(dirs, key=len, reverse=True):
+            if not parts:
+                continue
+            parent = dirs[parts[:-1]]  # load() materialized every ancestor
+            if dirs[parts]:
+                parent[parts[-1]] = ("t", self._put_tree(dirs[parts]))
+            else:
+                parent.pop(parts[-1], None)  # Empty directories are not part of the tree
+        root = self._put_tree(dirs[()])
+        self._set_head(config, root)
+        return root, added
+
+    def rebuild(self, config, project_root, digests):
+        """Build the tree from scratch from {path: digest} (first use of a project)."""
+        self.conn.execute("DELETE FROM heads WHERE config = ?", (config,))
+        return self.update(config, project_root, digests)[0]
+
+    # -- pruning -----------------------------------------------------
+    def _reachable(self):
+        """Hashes of every tree node a head or snapshot reaches."""
+        roots = self.conn.execute("SELECT root FROM heads UNION SELECT root FROM snapshots").fetchall()
+        live, queue = set(), [root for (root,) in roots]
+        while queue:
+            node_hash = queue.pop()
+            if node_hash in live:
+                continue  # Shared subtree, already walked
+            live.add(node_hash)
+            queue.extend(h for kind, h in self._entries(node_hash).values() if kind == "t")
+        return live
+
+    def prune(self, force=False):
+        """
+        Delete the nodes no head or snapshot reaches. Skipped (returns 0)
+        until the node table has grown PRUNE_GROWTH-fold since the last
+        sweep, unless `force`. Returns the number of nodes deleted.
+        """
+        total = self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'live_nodes'").fetchone()
+        if not force and row is not None and total < row[0] * PRUNE_GROWTH:
+            return 0
+        live = self._reachable()
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS live (hash TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM live")
+        self.conn.executemany("INSERT INTO live VALUES (?)", ((h,) for h in live))
+        deleted = self.conn.execute("DELETE FROM nodes WHERE hash NOT IN (SELECT hash FROM live)").rowcount
+        self.conn.execute("DELETE FROM live")
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('live_nodes', ?)", (max(1, total - deleted),))
+        self.conn.commit()
+        return deleted
+
+    # -- diff --------------------------------------------------------
+    def diff(self, old_root, new_root, prefix=""):
+        """[(status, path)] with status added / removed / modified; skips equal subtrees."""
+        if old_root == new_root:
+            return []
+        old, new = self._entries(old_root), self._entries(new_root)
+        changes = []
+        for name in sorted(set(old) | set(new)):
+            path = f"{prefix}{name}"
+            before, after = old.get(name), new.get(name)
+            if before == after:
+                continue
+            if before and after and before[0] == after[0] == "t":
+                changes.extend(self.diff(before[1], after[1], path + "/"))
+            elif before and after and before[0] == after[0] == "b":
+                changes.append(("modified", path))
+            else:
+                if before:
+                    changes.extend(self._leaves(before, path, "removed"))
+                if after:
+                    changes.extend(self._leaves(after, path, "added"))
+        return changes
+
+    def _leaves(self, entry, path, status):
+        kind, node_hash = entry
+        if kind == "b":
+            return [(status, path)]
+        leaves = []
+        for name, child in sorted(self._entries(node_hash).items()):
+            leaves.extend(self._leaves(child, f"{path}/{name}", status))
+        return leaves
+
+
+def main():
+    args = sys.argv[1:]
+    store = MerkleStore()
+    try:
+        if args[:1] == ["--root"] and len(args) == 2:
+            print(store.head(os.path.abspath(args[1])) or EMPTY_TREE)
+        elif args[:1] == ["--diff"] and len(args) in (3, 4):
+            config = os.path.abspath(args[1])
+            old = store.resolve(config, args[2])
+            new = store.resolve(config, args[3] if len(args) == 4 else "head")
+            for status, path in store.diff(old, new):
+                print(f"{status:9} {path}")
+        else:
+            print("usage: atum_merkle.py --root <config> | --diff <config> <from> [<to>]", file=sys.stderr)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+ATUM Audit — per-day event index for the Art. 12 retention check.
+
+The journal compactor counts every replayed event against its UTC day and
+keeps one {min_ts, max_ts, events} entry per day in a small per-project
+index. No event is copied: the audit store keeps the records, this index
+only says on which days there are any.
+
+`check_retention_compliance()` walks every audit record. Its verdict can
+only change when the store changes (the atum_summary stamp catches that)
+or when the retention cutoff (now - the library's retention period) moves
+past records. `cutoff_crossed()` answers the second question from the
+index: the check reruns only when the cutoff has moved across a day that
+holds events, or across days whose records the index cannot account for.
+The period belongs to atum_audit (`retention_days()` reads it from the
+compliance checker); a library that does not expose it gets its verdict
+rechecked once per day instead.
+
+Days entirely before the cutoff can never be crossed again (the cutoff
+only moves forward), so `drop_expired()` removes them from the index as a
+unit each time a verdict is computed; the index stays as small as the
+retention window.
+
+Those unaccounted days (`unindexed`) are what the store held before its
+index existed. A project initialized through atum_scan is seeded at
+init (`seed_baseline`), and a store that is empty when its index is created
+has nothing before it either, so neither has an unindexed range. For an
+older store the range starts at its oldest record where the filesystem
+records file creation times (st_birthtime), and is open-ended otherwise;
+it stops mattering once the cutoff has passed the index's first day.
+
+Index dir: ~/.claude/cache/atum/retention/
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from hook_util import write_json
+
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum", "retention")
+
+
+def _key(config_path):
+    return hashlib.sha1(str(config_path).encode("utf-8")).hexdigest()[:16]
+
+
+def _index_path(config_path):
+    return os.path.join(INDEX_DIR, _key(config_path) + ".json")
+
+
+def _day(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _store_dir(config_path):
+    config_path = str(config_path)
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            store_path = json.load(f).get("store_path", "./audit_store")
+    except (OSError, ValueError):
+        store_path = "./audit_store"
+    return os.path.normpath(os.path.join(os.path.dirname(config_path), store_path))
+
+
+def _new_index(config_path, now):
+    """Index starting at `now`, with whatever the store already holds as unindexed."""
+    oldest, records = now, False
+    try:
+        for entry in os.scandir(_store_dir(config_path)):
+            st = entry.stat(follow_symlinks=False)
+            records = True
+            birth = getattr(st, "st_birthtime", None)
+            oldest = min(oldest, birth) if birth is not None and oldest is not None else None
+    except OSError:
+        pass
+    unindexed = [None if oldest is None else _day(oldest), _day(now)] if records else None
+    return {"unindexed": unindexed, "days": {}}
+
+
+def load_index(config_path):
+    """The project's day index, or None before it was first written."""
+    try:
+        with open(_index_path(config_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_index(config_path, index):
+    write_json(_index_path(config_path), index)
+
+
+def retention_days(compliance):
+    """Retention period `compliance.check_retention_compliance()` applies, or None if not exposed."""
+    try:
+        return int(compliance.retention_days)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def cutoff_day(days, now=None):
+    """UTC day before which records are past the retention period (today if it is unknown)."""
+    now = time.time() if now is None else now
+    if days is None:
+        return _day(now)
+    return _day(now - timedelta(days=days).total_seconds())
+
+
+def _count(index, stamps):
+    for ts in stamps:
+        entry = index["days"].setdefault(_day(ts), {"min_ts": ts, "max_ts": ts, "events": 0})
+        entry["min_ts"] = min(entry["min_ts"], ts)
+        entry["max_ts"] = max(entry["max_ts"], ts)
+        entry["events"] += 1
+
+
+def seed_baseline(config_path, started, finished, files):
+    """Start the index of a project just initialized: its store holds only the baseline."""
+    day = {"min_ts": started, "max_ts": finished, "events": max(1, files)}  # One record per file
+    _save_index(config_path, {"unindexed": None, "days": {_day(started): day}})
+
+
+def add_events(config_path, records):
+    """Count replayed journal records against their days."""
+    if not records:
+        return
+    now = time.time()
+    index = load_index(config_path) or _new_index(config_path, now)
+    _count(index, [r.get("ts") or now for r in records])
+    _save_index(config_path, index)
+
+
+def drop_expired(config_path, cutoff):
+    """Remove the days before `cutoff` from the index: no later cutoff can cross them."""
+    index = load_index(config_path)
+    if index is None:
+        return
+    days = {day: entry for day, entry in index["days"].items() if day >= cutoff}
+    unindexed = index["unindexed"]
+    if unindexed is not None and unindexed[1] < cutoff:
+        unindexed = None
+    if len(days) != len(index["days"]) or unindexed != index["unindexed"]:
+        _save_index(config_path, {"unindexed": unindexed, "days": days})
+
+
+def cutoff_crossed(config_path, previous_cutoff, current_cutoff):
+    """True if records may have aged out between the two cutoff days."""
+    if previous_cutoff is None:
+        return True
+    if current_cutoff <= previous_cutoff:
+        return False
+    index = load_index(config_path)
+    if index is None:
+        index = _new_index(config_path, time.time())
+        _save_index(config_path, index)
+    unindexed = index["unindexed"]
+    if unindexed is not None:
+        first, last = unindexed
+        if previous_cutoff <= last and (first is None or first < current_cutoff):
+            return True  # Records from before the index may sit in [previous, current)
+    return any(
+        previous_cutoff <= day < current_cutoff and entry["events"]
+        for day, entry in index["days"].items()
+    )
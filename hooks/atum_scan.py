@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+ATUM Audit — parallel, time-budgeted baseline scan for auto-init.
+
+`auto_init_project` used to run inside SessionStart, so the first prompt of a
+session in a large, not yet tracked repo waited for the whole baseline. Now
+the hook calls `start(project_root)`, which:
+
+  1. walks `watch_paths`, pruning `exclude_patterns` through one compiled
+     matcher (directories are pruned before they are listed);
+  2. hashes files in a process pool (atum_fingerprint digests, recorded in
+     the fingerprint store the journal compactor short-circuits on) and
+     hands the digests to `auto_init_project(..., digests=...)`, so the
+     baseline reads every file once. A library without that keyword hashes
+     the tree itself: the scan then only walks and sizes it;
+  3. stops at the time budget (ATUM_SCAN_BUDGET_SECONDS, default 1.5s),
+     which includes the estimated `auto_init_project` run (INIT_BYTES_PER_SECOND
+     of rehashing when the digests cannot be handed over). Files larger
+     than SYNC_MAX_BYTES are always left to the background.
+
+Finished within budget -> `auto_init_project` runs right away on a warm
+page cache. Otherwise the walk cursor and the unhashed files are saved and
+a detached worker (`atum_scan.py --resume <root>`) finishes the scan, runs
+`auto_init_project`, then compacts the journal. The per-root lock is held
+by whoever initializes: the journal compactor auto-inits through `start()`
+too, and defers a project's events while its worker is still running.
+A crash resumes from the last saved progress.
+
+The first Merkle tree of an initialized project (atum_merkle) is built the
+same way, off the hook path: `start_seed(config)` hands it to a detached
+seeder (`atum_scan.py --seed <config>`, per-config lock), which reuses
+fingerprints that still match, hashes the rest into its own resumable
+digest cache and installs the tree through the journal compactor.
+
+Progress dir: ~/.claude/cache/atum/scan/
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+from atum_fastpath import DEFAULT_EXCLUDES
+from hook_util import acquire_lock, release_lock, spawn_detached, write_json
+
+SCAN_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum", "scan")
+BUDGET_SECONDS = float(os.environ.get("ATUM_SCAN_BUDGET_SECONDS", "1.5"))
+SYNC_MAX_BYTES = 16 * 1024 * 1024
+CHUNK_FILES = 64
+CHUNK_BYTES = 8 * 1024 * 1024
+INIT_BYTES_PER_SECOND = 256 * 1024 * 1024  # Library rehash estimate, no digests handed over
+POOL_THRESHOLD = 256  # Fewer files than this: hashing in-process beats pool start-up
+SAVE_EVERY_SECONDS = 5  # Background progress checkpoint interval
+STALE_LOCK_SECONDS = 300
+# Same defaults as the atum-audit.config.json template
+DEFAULT_CONFIG = {
+    "watch_paths": ["./"],
+    "exclude_patterns": DEFAULT_EXCLUDES,
+    "hash_algorithm": "sha256",
+    "dual_hash": False,
+    "max_file_size_bytes": 524288000,
+}
+
+
+def _paths(root):
+    key = hashlib.sha1(os.path.realpath(root).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SCAN_DIR, key + ".json"), os.path.join(SCAN_DIR, key + ".lock")
+
+
+def _project_config(root):
+    from atum_fastpath import CONFIG_NAME
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(os.path.join(root, CONFIG_NAME), "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return config
+
+
+def _load_progress(root):
+    progress_file, _ = _paths(root)
+    try:
+        with open(progress_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    return _new_state(root)
+
+
+def _new_state(root):
+    root = os.path.realpath(root)
+    config = _project_config(root)
+    dirs = [os.path.normpath(os.path.join(root, p)) for p in config.get("watch_paths") or ["./"]]
+    return {
+        "root": root, "dirs": dirs, "files": [], "large": [], "hashed": 0, "bytes": 0,
+        "hash": True, "started": time.time(),
+    }
+
+
+def _save_progress(state):
+    progress_file, _ = _paths(state["root"])
+    write_json(progress_file, state)
+
+
+def _expand(state, directory, matcher):
+    """List one directory: excluded entries are dropped, subdirectories queued."""
+    root = state["root"]
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        rel = os.path.relpath(entry.path, root).replace(os.sep, "/")
+        if matcher.match(rel):
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                state["dirs"].append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                state["files"].append([entry.path, entry.stat(follow_symlinks=False).st_size])
+        except OSError:
+            continue
+
+
+def _hash_chunk(paths, algos):
+    """Pool task: [(path, (size, mtime_ns, inode), digest)] for the files still readable."""
+    from atum_fingerprint import hash_file, stat_key
+    rows = []
+    for path in paths:
+        try:
+            key = stat_key(os.stat(path))
+            rows.append((path, key, hash_file(path, algos)))
+        except (OSError, ValueError):
+            continue
+    return rows
+
+
+def _size_chunk(paths):
+    """Walk-only mode: the library hashes, the scan only needs the byte count."""
+    return sum(_size(path) for path in paths)
+
+
+def _next_chunk(state, matcher, defer_above, max_size):
+    """Up to CHUNK_FILES / CHUNK_BYTES of files, expanding directories as needed."""
+    chunk, total = [], 0
+    while len(chunk) < CHUNK_FILES and total < CHUNK_BYTES:
+        if not state["files"]:
+            if not state["dirs"]:
+                break
+            _expand(state, state["dirs"].pop(), matcher)
+            continue
+        path, size = state["files"].pop()
+        if max_size and size > max_size:
+            continue  # Over the project limit: the agent never hashes it either
+        if defer_above and size > defer_above:
+            state["large"].append([path, size])
+            continue
+        chunk.append(path)
+        total += size
+    return chunk
+
+
+def scan(state, deadline=None, sync=False):
+    """Hash until done or `deadline`; returns True when nothing is left."""
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from atum_fastpath import CONFIG_NAME, compile_globs
+    from atum_fingerprint import FingerprintStore, algorithms
+
+    config = _project_config(state["root"])
+    matcher = compile_globs(config.get("exclude_patterns") or [])
+    algos = algorithms(config)
+    config_key = os.path.join(state["root"], CONFIG_NAME)
+    max_size = config.get("max_file_size_bytes")
+    if not sync:
+        # Background pass also takes the large files the hook left behind
+        state["files"].extend(state["large"])
+        state["large"] = []
+    defer_above = SYNC_MAX_BYTES if sync and state["hash"] else None
+    store = FingerprintStore()
+
+    def record(rows):
+        for path, key, digest in rows:
+            store.put(config_key, path, key, digest)
+            state["bytes"] += key[0]
+        state["hashed"] += len(rows)
+
+    def expired():
+        return deadline is not None and time.monotonic() >= deadline
+
+    def take():
+        return _next_chunk(state, matcher, defer_above, max_size)
+
+    try:
+        # Walk a little first: small trees never pay for the pool
+        while state["dirs"] and len(state["files"]) < POOL_THRESHOLD and not expired():
+            _expand(state, state["dirs"].pop(), matcher)
+        if not state["hash"]:
+            while not expired():
+                chunk = take()
+                if not chunk:
+                    break
+                state["bytes"] += _size_chunk(chunk)
+        elif not state["dirs"] and len(state["files"]) < POOL_THRESHOLD:
+            while not expired():
+                chunk = take()
+                if not chunk:
+                    break
+                record(_hash_chunk(chunk, algos))
+        else:
+            workers = min(8, os.cpu_count() or 1)
+            pool = ProcessPoolExecutor(max_workers=workers)
+            inflight = {}
+            try:
+                while not expired():
+                    while len(inflight) < workers * 2:
+                        chunk = take()
+                        if not chunk:
+                            break
+                        inflight[pool.submit(_hash_chunk, chunk, algos)] = chunk
+                    if not inflight:
+                        break
+                    timeout = None if deadline is None else max(0, deadline - time.monotonic())
+                    done, _ = wait(inflight, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        inflight.pop(future)
+                        record(future.result())
+            finally:
+                # Budget hit: unfinished chunks go back to the queue
+                for chunk in inflight.values():
+                    state["files"].extend([p, _size(p)] for p in chunk)
+                pool.shutdown(wait=False, cancel_futures=True)
+        store.commit()
+    finally:
+        store.close()
+    return not (state["dirs"] or state["files"] or (state["large"] and not sync))
+
+
+def tracked_digests(config_path, cache, fingerprints=None, on_chunk=None):
+    """
+    {path: digest} of every file an initialized project tracks, to seed its
+    Merkle tree. Digests whose stat still matches in `cache` or in the
+    `fingerprints` store are reused; the rest are hashed (in the pool for
+    large sets) and recorded in `cache` only: a fingerprint tells the journal
+    compactor the audit agent has seen that content, which seeding does not
+    make true. `on_chunk()` runs after each hashed chunk.
+    """
+    from itertools import repeat
+    from atum_fastpath import compile_globs
+    from atum_fingerprint import algorithms, stat_key
+
+    config_path = str(config_path)
+    root = os.path.dirname(config_path)
+    state = _new_state(root)
+    if state["root"] != root:  # Keep the config's spelling of the path, as journal events do
+        state["dirs"] = [os.path.join(root, os.path.relpath(d, state["root"])) for d in state["dirs"]]
+        state["root"] = root
+    config = _project_config(root)
+    matcher = compile_globs(config.get("exclude_patterns") or [])
+    algos = algorithms(config)
+    digests, stale = {}, []
+    while True:
+        chunk = _next_chunk(state, matcher, None, config.get("max_file_size_bytes"))
+        if not chunk:
+            break
+        for path in chunk:
+            try:
+                key = stat_key(os.stat(path))
+            except OSError:
+                continue
+            for store in (cache, fingerprints):
+                row = store.get(config_path, path) if store is not None else None
+                if row is not None and tuple(row[:3]) == key and row[3]:
+                    digests[path] = row[3]
+                    break
+            else:
+                stale.append(path)
+
+    def record(rows):
+        for path, key, digest in rows:
+            cache.put(config_path, path, key, digest)
+            digests[path] = digest
+        if on_chunk is not None:
+            on_chunk()
+
+    chunks = [stale[i:i + CHUNK_FILES] for i in range(0, len(stale), CHUNK_FILES)]
+    if len(stale) < POOL_THRESHOLD:
+        for chunk in chunks:
+            record(_hash_chunk(chunk, algos))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+            for rows in pool.map(_hash_chunk, chunks, repeat(algos)):
+                record(rows)
+    return digests
+
+
+def _seed_paths(config_path):
+    key = hashlib.sha1(str(config_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SCAN_DIR, key + ".seed.db"), os.path.join(SCAN_DIR, key + ".seed.lock")
+
+
+def start_seed(config_path):
+    """Hand the first Merkle tree of a project to a background seeder; False if none runs."""
+    _, lock_file = _seed_paths(config_path)
+    os.makedirs(SCAN_DIR, exist_ok=True)
+    if not acquire_lock(lock_file, STALE_LOCK_SECONDS):
+        return True  # Already seeding
+    if spawn_detached([sys.executable, os.path.abspath(__file__), "--seed", str(config_path)]):
+        return True  # The seeder inherits the lock
+    release_lock(lock_file)
+    return False
+
+
+def seed(config_path):
+    """
+    Background seeder: hash the tracked set into a private digest cache
+    (committed every SAVE_EVERY_SECONDS, so a crashed seeder resumes from
+    it), then hand the tree to atum_journal.install_tree(), which restats
+    under the compactor lock and only rehashes files edited meanwhile.
+    """
+    from atum_fingerprint import FingerprintStore
+    from atum_journal import install_tree
+    config_path = str(config_path)
+    cache_file, lock_file = _seed_paths(config_path)
+    try:
+        cache = FingerprintStore(cache_file)
+        fingerprints = FingerprintStore()
+        saved = [time.monotonic()]
+
+        def checkpoint():
+            if time.monotonic() - saved[0] >= SAVE_EVERY_SECONDS:
+                cache.commit()
+                os.utime(lock_file)  # Heartbeat
+                saved[0] = time.monotonic()
+
+        try:
+            tracked_digests(config_path, cache, fingerprints, checkpoint)
+            cache.commit()
+            install_tree(config_path, lambda: tracked_digests(config_path, cache, fingerprints))
+        finally:
+            cache.close()
+            fingerprints.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(cache_file + suffix)
+            except OSError:
+                pass
+    finally:
+        release_lock(lock_file)
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _takes_digests(lib_dir):
+    if lib_dir and lib_dir not in sys.path:
+        sys.path.insert(0, lib_dir)
+    from atum_audit.discovery import auto_init_project
+    from atum_fingerprint import accepts_keyword
+    return accepts_keyword(auto_init_project, "digests")
+
+
+def _finish(state, lib_dir):
+    from atum_audit.discovery import auto_init_project
+    root = state["root"]
+    kwargs = {}
+    if state["hash"]:
+        from atum_fastpath import CONFIG_NAME
+        from atum_fingerprint import FingerprintStore
+        store = FingerprintStore()
+        try:
+            kwargs["digests"] = store.digests_under(os.path.join(root, CONFIG_NAME), root + os.sep)
+        finally:
+            store.close()
+    started = time.time()
+    config_path = auto_init_project(root, lib_dir=lib_dir or None, **kwargs)
+    if config_path is not None:
+        from atum_retention import seed_baseline
+        seed_baseline(config_path, started, time.time(), state["hashed"])
+    progress_file, _ = _paths(root)
+    try:
+        os.remove(progress_file)
+    except OSError:
+        pass
+    return config_path
+
+
+def _init_seconds(state):
+    """Estimated `auto_init_project` time: a full rehash unless the digests are handed over."""
+    return 0 if state["hash"] else state["bytes"] / INIT_BYTES_PER_SECOND
+
+
+def start(root, lib_dir=None, budget=None):
+    """
+    Baseline-scan and initialize `root` within the budget. Returns
+    (status, config_path, hashed) with status "initialized" (auto_init_project
+    ran) or "background" (a worker, this one or an earlier one, is on it).
+    """
+    _, lock_file = _paths(root)
+    os.makedirs(SCAN_DIR, exist_ok=True)
+    if not acquire_lock(lock_file, STALE_LOCK_SECONDS):
+        return "background", None, _load_progress(root)["hashed"]  # Worker already on it
+    handed_off = False
+    try:
+        state = _load_progress(root)
+        state["hash"] = _takes_digests(lib_dir)
+        deadline = time.monotonic() + (BUDGET_SECONDS if budget is None else budget)
+        done = scan(state, deadline, sync=True)
+        if done and not state["large"] and time.monotonic() + _init_seconds(state) < deadline:
+            return "initialized", _finish(state, lib_dir), state["hashed"]
+        _save_progress(state)
+        # The worker inherits the lock; if it cannot start, the next event retries
+        handed_off = spawn_detached([sys.executable, os.path.abspath(__file__), "--resume", str(root)])
+        return "background", None, state["hashed"]
+    finally:
+        if not handed_off:
+            release_lock(lock_file)
+
+
+def resume(root):
+    """Background worker: finish the scan, initialize the project, replay deferred events."""
+    _, lock_file = _paths(root)
+    lib_dir = os.environ.get("ATUM_PROJECT_DIR", "")
+    try:
+        state = _load_progress(root)
+        while not scan(state, time.monotonic() + SAVE_EVERY_SECONDS):
+            _save_progress(state)
+            os.utime(lock_file)  # Heartbeat
+        _save_progress(state)
+        if lib_dir and lib_dir not in sys.path:
+            sys.path.insert(0, lib_dir)
+        config_path = _finish(state, lib_dir)
+        if config_path is not None:
+            from atum_fastpath import remember
+            remember(root, "config", config_path)
+    finally:
+        release_lock(lock_file)
+    # The compactor held this project's events back while the lock was taken
+    from atum_journal import compact
+    compact()
+
+
+if __name__ == "__main__":
+    try:
+        if "--resume" in sys.argv:
+            resume(sys.argv[sys.argv.index("--resume") + 1])
+        elif "--seed" in sys.argv:
+            seed(sys.argv[sys.argv.index("--seed") + 1])
+    except Exception as e:
+        print(f"[ATUM] WARNING: baseline scan error — {e}", file=sys.stderr)
+    sys.exit(0)
@@ -0,0 +1,139 @@
+"""
+ATUM Audit — materialized per-project summary for the post-commit check.
+
+`agent.stats()` and `agent.violations()` scan the whole audit store. The
+journal compactor is the only writer of the store from the hooks, so it
+keeps this summary current batch by batch instead: each flushed batch adds
+its change in tracked files (files added minus files removed from the
+project's Merkle tree) to the summary. Journaled edits record new versions;
+they register no AI systems and raise no integrity violations, so those
+counts carry over. atum-compliance-check.py then reads one small JSON file
+per commit instead of scanning the store (and without importing atum_audit).
+
+A summary is trusted only while the store directory looks exactly as it
+did when the summary was written: same (name, size, mtime_ns) for every
+entry of `store_path`. Anything else (a CLI scan, a manual edit) falls
+back to the agent, which rewrites the summary (`refresh_summary`). The
+same full recomputation covers a project's first summary and batches the
+compactor cannot count (no Merkle tree yet).
+
+The Art. 12 retention verdict is materialized too, tagged with the
+library's retention period and the cutoff day it was computed for;
+atum_retention decides from its per-day event index whether a later
+cutoff can have changed it.
+
+Summary dir: ~/.claude/cache/atum/summary/
+"""
+
+import hashlib
+import json
+import os
+import time
+
+from hook_util import write_json
+
+SUMMARY_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum", "summary")
+MAX_LISTED_VIOLATIONS = 3
+
+
+def _summary_path(config_path):
+    key = hashlib.sha1(str(config_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SUMMARY_DIR, key + ".json")
+
+
+def _project_config(config_path):
+    try:
+        with open(str(config_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def store_stamp(config_path):
+    """(name, size, mtime_ns) of every entry in the project's audit store."""
+    config_path = str(config_path)
+    store_path = _project_config(config_path).get("store_path", "./audit_store")
+    store_dir = os.path.normpath(os.path.join(os.path.dirname(config_path), store_path))
+    stamp = []
+    try:
+        for entry in os.scandir(store_dir):
+            st = entry.stat(follow_symlinks=False)
+            stamp.append([entry.name, st.st_size, st.st_mtime_ns])
+    except OSError:
+        return None
+    return sorted(stamp)
+
+
+def load_summary(config_path):
+    """The materialized summary, or None if missing or the store changed since."""
+    try:
+        with open(_summary_path(config_path), "r", encoding="utf-8") as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if summary.get("stamp") is None or summary["stamp"] != store_stamp(config_path):
+        return None
+    return summary
+
+
+def save_summary(config_path, summary):
+    summary["stamp"] = store_stamp(config_path)
+    summary["updated_at"] = time.time()
+    write_json(_summary_path(config_path), summary)
+    return summary
+
+
+def _retention(agent, config_path):
+    from atum_retention import cutoff_day, drop_expired, retention_days
+    result = agent.compliance.check_retention_compliance()
+    days = retention_days(agent.compliance)
+    cutoff = cutoff_day(days)
+    if days is not None:
+        drop_expired(config_path, cutoff)
+    return {
+        "all_ok": result["all_ok"],
+        "count": len(result["violations"]),
+        "days": days,
+        "cutoff_day": cutoff,
+    }
+
+
+def _cutoff_moved(config_path, cached):
+    from atum_retention import cutoff_crossed, cutoff_day
+    current = cutoff_day(cached["days"])
+    if cached["days"] is None:
+        return current != cached["cutoff_day"]  # Period unknown: recheck once per day
+    return cutoff_crossed(config_path, cached["cutoff_day"], current)
+
+
+def apply_batch(config_path, summary, tracked_delta):
+    """Fold one flushed batch into `summary`, which was current before the batch."""
+    summary["tracked_files"] = max(0, summary["tracked_files"] + tracked_delta)
+    return save_summary(config_path, summary)
+
+
+def refresh_summary(agent, config_path):
+    """Recompute from the agent (full store scan) and materialize: init and repair only."""
+    stats = agent.stats()
+    violations = agent.violations()
+    summary = {
+        "tracked_files": stats.get("tracked_files", 0),
+        "ai_systems": stats.get("ai_systems", 0),
+        "violation_count": len(violations),
+        "violations": [
+            {"path": v.get("path", "unknown"), "desc": v.get("desc", "")}
+            for v in violations[:MAX_LISTED_VIOLATIONS]
+        ],
+    }
+    if summary["ai_systems"] > 0:
+        summary["retention"] = _retention(agent, config_path)
+    return save_summary(config_path, summary)
+
+
+def retention_status(summary, config_path, agent_factory):
+    """Materialized retention verdict, recomputed only if the cutoff crossed a day with events."""
+    cached = summary.get("retention")
+    if cached is None or _cutoff_moved(config_path, cached):
+        summary["retention"] = _retention(agent_factory(), config_path)
+        save_summary(config_path, summary)
+    return summary["retention"]
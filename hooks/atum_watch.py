@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+ATUM Audit — inotify watcher feeding the event journal (Linux).
+
+With `enable_watchdog` on, SessionStart makes sure one watcher runs per
+tracked project (`atum_watch.py --watch <config>`). It replaces periodic
+`scan_interval_seconds` walks: steady-state cost follows the number of
+changed files, not the size of the tree.
+
+  - Watches are added per directory; directories matching
+    `exclude_patterns` (node_modules, .git, audit_store, ...) are never
+    watched, so their churn never reaches this process.
+  - Events are coalesced over a short quiet window: a burst of writes, a
+    write-then-rename save, create+modify all collapse to one journal
+    line per path; create+delete cancels out.
+  - A new or moved-in directory gets watched and rescanned (files may
+    land before the watch exists).
+  - On IN_Q_OVERFLOW the kernel dropped events: the watcher rescans the
+    tree by stat against the fingerprint store and journals only files
+    whose (size, mtime_ns, inode) differ, or that appeared/disappeared.
+
+Journaled events go through atum_journal exactly like Write/Edit events.
+The watcher exits after ATUM_WATCH_IDLE_SECONDS without events (default 1h)
+and is single-flight per project (pid file with heartbeat).
+
+Watch dir: ~/.claude/cache/atum/watch/
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+from hook_util import acquire_lock, release_lock, spawn_detached
+
+WATCH_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache", "atum", "watch")
+IDLE_SECONDS = float(os.environ.get("ATUM_WATCH_IDLE_SECONDS", "3600"))
+QUIET_SECONDS = 0.5  # Coalescing window: flush once the tree has been quiet this long
+MAX_HOLD_SECONDS = 3.0  # ... or once the oldest pending event is this old
+HEARTBEAT_SECONDS = 30
+STALE_SECONDS = HEARTBEAT_SECONDS * 4
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def supported():
+    return sys.platform.startswith("linux")
+
+
+def _lock_path(config_path):
+    key = hashlib.sha1(str(config_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(WATCH_DIR, key + ".pid")
+
+
+# ============================================================
+# START (SessionStart side)
+# ============================================================
+def ensure_watcher(config_path):
+    """Spawn the project's watcher unless one is alive; no-op off Linux or with watchdog off."""
+    if not supported():
+        return False
+    try:
+        with open(str(config_path), "r", encoding="utf-8") as f:
+            if not json.load(f).get("enable_watchdog"):
+                return False
+    except (OSError, ValueError):
+        return False
+    os.makedirs(WATCH_DIR, exist_ok=True)
+    lock = _lock_path(config_path)
+    if not acquire_lock(lock, STALE_SECONDS):
+        return True  # Watcher alive
+    if not spawn_detached([sys.executable, os.path.abspath(__file__), "--watch", str(config_path)]):
+        release_lock(lock)
+        return False
+    return True
+
+
+# ============================================================
+# WATCH (background side)
+# ============================================================
+class Watcher:
+    def __init__(self, config_path):
+        from atum_fastpath import matcher_for
+        from atum_fingerprint import FingerprintStore
+        self.config_path = str(config_path)
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.root = os.path.dirname(os.path.abspath(self.config_path))
+        self.watch_roots = [
+            os.path.normpath(os.path.join(self.root, p)) for p in config.get("watch_paths") or ["./"]
+        ]
+        self.matcher_for = matcher_for
+        self.fingerprints = FingerprintStore()
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.wd_paths = {}
+        self.pending = {}  # path -> "created" | "modified" | "deleted"
+        self.first_pending = None
+
+    def excluded(self, path):
+        return self.matcher_for(self.config_path).excluded(path)  # Follows config edits
+
+    def add_tree(self, directory):
+        """Watch `directory` and every non-excluded subdirectory."""
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            if self.excluded(current):
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                continue  # Vanished, or fs.inotify.max_user_watches reached
+            self.wd_paths[wd] = current
+            try:
+                stack.extend(e.path for e in os.scandir(current) if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def drop_tree(self, directory):
+        prefix = directory + os.sep
+        for wd, path in list(self.wd_paths.items()):
+            if path == directory or path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.wd_paths[wd]
+        for path in self.fingerprints.paths_under(self.config_path, prefix):
+            self.note(path, "deleted")
+
+    def rescan(self, directory):
+        """Targeted rescan: journal only files whose stat fingerprint moved."""
+        seen = set()
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            if self.excluded(current):
+                continue
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                if self.excluded(entry.path):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                seen.add(entry.path)
+                row = self.fingerprints.get(self.config_path, entry.path)
+                if row is None:
+                    self.note(entry.path, "created")
+                elif tuple(row[:3]) != (st.st_size, st.st_mtime_ns, st.st_ino):
+                    self.note(entry.path, "modified")
+        for path in self.fingerprints.paths_under(self.config_path, directory + os.sep):
+            if path not in seen and not os.path.exists(path):
+                self.note(path, "deleted")
+
+    def note(self, path, event):
+        previous = self.pending.get(path)
+        if previous == "created" and event == "deleted":
+            del self.pending[path]  # Temp file: never existed as far as the audit goes
+            return
+        if previous == "created" and event == "modified":
+            return
+        if previous == "deleted" and event == "created":
+            event = "modified"  # Atomic replace (write tmp, rename over)
+        self.pending[path] = event
+        if self.first_pending is None:
+            self.first_pending = time.monotonic()
+
+    def flush(self):
+        if not self.pending:
+            return
+        from atum_journal import append_event, schedule_compaction
+        matcher = self.matcher_for(self.config_path)
+        for path, event in self.pending.items():
+            append_event(path, event, category=matcher.category(path))
+        self.pending.clear()
+        self.first_pending = None
+        schedule_compaction()
+
+    def handle(self, wd, mask, cookie, name):
+        if mask & IN_Q_OVERFLOW:
+            # Events were dropped: re-arm watches for new directories, then stat-diff
+            for root in self.watch_roots:
+                self.add_tree(root)
+                self.rescan(root)
+            return
+        if mask & IN_IGNORED:
+            self.wd_paths.pop(wd, None)
+            return
+        directory = self.wd_paths.get(wd)
+        if directory is None or not name:
+            return
+        path = os.path.join(directory, name)
+        if self.excluded(path):
+            return
+        is_dir = bool(mask & IN_ISDIR)
+        if mask & IN_MOVED_FROM:
+            if is_dir:
+                self.drop_tree(path)
+            else:
+                self.note(path, "deleted")
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            if is_dir:
+                self.add_tree(path)
+                self.rescan(path)
+            else:
+                self.note(path, "created")
+        elif is_dir:
+            return
+        elif mask & IN_DELETE:
+            self.note(path, "deleted")
+        elif mask & (IN_CLOSE_WRITE | IN_MODIFY | IN_ATTRIB):
+            self.note(path, "modified")
+
+    def read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return 0
+        offset = count = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            raw = data[offset + EVENT_HEADER.size: offset + EVENT_HEADER.size + length]
+            name = os.fsdecode(raw.split(b"\0", 1)[0])
+            offset += EVENT_HEADER.size + length
+            self.handle(wd, mask, cookie, name)
+            count += 1
+        return count
+
+    def run(self, lock):
+        for root in self.watch_roots:
+            self.add_tree(root)
+        last_event = last_beat = time.monotonic()
+        try:
+            while os.path.exists(self.config_path):
+                ready, _, _ = select.select([self.fd], [], [], QUIET_SECONDS)
+                now = time.monotonic()
+                if ready and self.read_events():
+                    last_event = now
+                if self.pending and (
+                    now - last_event >= QUIET_SECONDS or now - self.first_pending >= MAX_HOLD_SECONDS
+                ):
+                    self.flush()
+                if now - last_beat >= HEARTBEAT_SECONDS:
+                    os.utime(lock)
+                    last_beat = now
+                if not self.pending and now - last_event >= IDLE_SECONDS:
+                    break
+        finally:
+            self.flush()
+
+
+def watch(config_path):
+    import signal
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # Unwind: flush + unlock
+    lock = _lock_path(config_path)
+    try:
+        with open(lock, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        watcher = Watcher(config_path)
+        try:
+            watcher.run(lock)
+        finally:
+            os.close(watcher.fd)
+            watcher.fingerprints.close()
+    finally:
+        release_lock(lock)
+
+
+if __name__ == "__main__":
+    try:
+        if "--watch" in sys.argv:
+            watch(sys.argv[sys.argv.index("--watch") + 1])
+    except Exception as e:
+        print(f"[ATUM] WARNING: watcher error — {e}", file=sys.stderr)
+    sys.exit(0)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Debounce queue for heavy PostToolUse hooks.
+
+A burst of edits to the same file (an agent making 5-10 quick edits to a
+manifest) collapses into one job keyed by (hook, key). Each enqueue pushes the
+job's deadline to now + quiet window; a single detached worker runs jobs whose
+window has closed. The Stop hook (`hook_debounce.py --flush`) runs whatever is
+still pending so nothing outlives the turn.
+
+Jobs re-invoke the hook's own command with the original stdin payload and
+CLAUDE_HOOK_DEBOUNCE_RUN=1 set, so the hook performs the real work. Finished
+outputs are kept until reported: the next invocation of the same hook
+(drain_results) or the Stop flush, whichever comes first.
+
+Queue dir: ~/.claude/cache/hook-queue/
+  <job-id>.json      pending job (rewritten on every enqueue)
+  <job-id>.running   claimed by the worker or a flush (atomic rename, mtime =
+                     claim time); one left behind by a killed flush goes
+                     back to pending once older than JOB_TIMEOUT_SECONDS
+  results.jsonl      finished outputs not yet reported
+  worker.lock        single-flight worker marker (heartbeat via mtime)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+from hook_util import acquire_lock, release_lock, spawn_detached, write_json
+
+QUEUE_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache", "hook-queue")
+RESULTS_FILE = os.path.join(QUEUE_DIR, "results.jsonl")
+WORKER_LOCK = os.path.join(QUEUE_DIR, "worker.lock")
+RUN_ENV = "CLAUDE_HOOK_DEBOUNCE_RUN"
+DEFAULT_WINDOW_SECONDS = float(os.environ.get("CLAUDE_HOOK_DEBOUNCE_SECONDS", "15"))
+JOB_TIMEOUT_SECONDS = 120
+STALE_LOCK_SECONDS = JOB_TIMEOUT_SECONDS * 2
+
+
+def is_deferred_run():
+    """True when the current process is the deferred job itself."""
+    return os.environ.get(RUN_ENV) == "1"
+
+
+def enabled():
+    return DEFAULT_WINDOW_SECONDS > 0 and not is_deferred_run()
+
+
+def _job_path(hook, key, suffix=".json"):
+    job_id = hashlib.sha1(f"{hook}\0{key}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(QUEUE_DIR, job_id + suffix)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================
+# ENQUEUE (called from the hook, must stay cheap)
+# ============================================================
+def enqueue(hook, key, command, payload, window=None):
+    """Queue (or re-arm) the job for `key`; returns how many events it now covers."""
+    os.makedirs(QUEUE_DIR, exist_ok=True)
+    path = _job_path(hook, key)
+    previous = _read_json(path) or {}
+    now = time.time()
+    job = {
+        "hook": hook,
+        "key": key,
+        "command": command,
+        "payload": payload,
+        "cwd": os.getcwd(),
+        "first_event": previous.get("first_event", now),
+        "deadline": now + (DEFAULT_WINDOW_SECONDS if window is None else window),
+        "events": previous.get("events", 0) + 1,
+    }
+    write_json(path, job)
+    _ensure_worker()
+    return job["events"]
+
+
+def _ensure_worker():
+    if not acquire_lock(WORKER_LOCK, STALE_LOCK_SECONDS):
+        return  # A live worker will pick the job up
+    if not spawn_detached([sys.executable, os.path.abspath(__file__), "--worker"]):
+        release_lock(WORKER_LOCK)
+
+
+# ============================================================
+# RUN JOBS
+# ============================================================
+def _pending_jobs():
+    try:
+        names = os.listdir(QUEUE_DIR)
+    except OSError:
+        return []
+    jobs = []
+    for name in names:
+        if name.endswith(".json"):
+            job = _read_json(os.path.join(QUEUE_DIR, name))
+            if job:
+                jobs.append((job, os.path.join(QUEUE_DIR, name)))
+    return jobs
+
+
+def _run_job(path):
+    """Claim the job file by rename (so worker and flush never double-run) and run it."""
+    running = path[: -len(".json")] + ".running"
+    try:
+        os.replace(path, running)
+        os.utime(running)  # Claim time: tells a live run from an orphan
+    except OSError:
+        return  # Claimed by someone else
+    job = _read_json(running)
+    if not job:
+        return
+    import subprocess
+    env = dict(os.environ, **{RUN_ENV: "1"})
+    try:
+        proc = subprocess.run(
+            job["command"], input=job["payload"], capture_output=True, text=True,
+            timeout=JOB_TIMEOUT_SECONDS, cwd=job.get("cwd") or None, env=env,
+        )
+        output = proc.stdout.strip()
+    except subprocess.TimeoutExpired:
+        output = ""
+    except OSError as e:
+        output = json.dumps({"reason": f"{job['hook']}: deferred job failed — {e}"})
+    result = {
+        "hook": job["hook"],
+        "key": job["key"],
+        "events": job.get("events", 1),
+        "output": output,
+        "finished_at": time.time(),
+    }
+    with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+    try:
+        os.remove(running)
+    except OSError:
+        pass
+
+
+def _requeue_orphans():
+    """Put back jobs whose claimer died (a Stop flush killed by the hook timeout)."""
+    try:
+        names = os.listdir(QUEUE_DIR)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith(".running"):
+            continue
+        running = os.path.join(QUEUE_DIR, name)
+        pending = running[: -len(".running")] + ".json"
+        try:
+            if time.time() - os.path.getmtime(running) < JOB_TIMEOUT_SECONDS + 5:
+                continue  # Still within its run
+            if os.path.exists(pending):
+                os.remove(running)  # Re-enqueued since: the pending job covers it
+            else:
+                os.replace(running, pending)
+        except OSError:
+            continue
+
+
+def run_worker():
+    """Run due jobs until the queue is empty, then release the single-flight lock."""
+    while True:
+        _requeue_orphans()
+        jobs = _pending_jobs()
+        if not jobs:
+            release_lock(WORKER_LOCK)
+            # An enqueue may have landed between the scan and the unlock
+            if _pending_jobs():
+                _ensure_worker()
+            return
+        now = time.time()
+        for job, path in jobs:
+            if job["deadline"] <= now:
+                _run_job(path)
+        try:
+            os.utime(WORKER_LOCK)  # Heartbeat
+        except OSError:
+            pass
+        upcoming = [job["deadline"] for job, _ in _pending_jobs()]
+        if upcoming:
+            time.sleep(min(max(0.05, min(upcoming) - time.time()), DEFAULT_WINDOW_SECONDS or 1))
+
+
+def flush(hook=None):
+    """Run every pending job now (Stop event), regardless of its window."""
+    for job, path in _pending_jobs():
+        if hook is None or job["hook"] == hook:
+            _run_job(path)
+
+
+# ============================================================
+# REPORT RESULTS
+# ============================================================
+def drain_results(hook=None):
+    """Return and forget finished results (all hooks, or just `hook`)."""
+    claimed = f"{RESULTS_FILE}.{os.getpid()}.drain"
+    try:
+        os.replace(RESULTS_FILE, claimed)
+    except OSError:
+        return []
+    results, keep = [], []
+    with open(claimed, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            (results if hook is None or result["hook"] == hook else keep).append(result)
+    if keep:
+        with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(r) + "\n" for r in keep)
+    os.remove(claimed)
+    return results
+
+
+def result_message(result):
+    """Human-readable text of a finished job (its hook's `reason`, or raw stdout)."""
+    try:
+        data = json.loads(result["output"])
+        text = data.get("reason") or data.get("systemMessage") or ""
+    except (ValueError, AttributeError):
+        text = result["output"]
+    if not text:
+        return ""  # Nothing to report (e.g. the journal compaction)
+    if result.get("events", 1) > 1:
+        text += f"\n({result['events']} edits coalesced into one run)"
+    return text
+
+
+def main():
+    if "--worker" in sys.argv:
+        run_worker()
+        return
+    if "--flush" in sys.argv:
+        # Stop hook: finish pending jobs and surface anything not yet reported
+        try:
+            sys.stdin.read()
+        except (OSError, ValueError):
+            pass
+        flush()
+        messages = [m for m in (result_message(r) for r in drain_results()) if m]
+        if messages:
+            print(json.dumps({"systemMessage": "\n\n".join(messages)}))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"[hook-debounce] WARNING: {e}", file=sys.stderr)
+    sys.exit(0)
@@ -0,0 +1,70 @@
+"""
+Shared plumbing for hooks that hand work to a background process.
+
+  - acquire_lock / release_lock: single-flight marker file created with
+    O_EXCL. The holder heartbeats by touching it; a marker older than
+    `stale_seconds` belongs to a process that died and is taken over.
+  - spawn_detached: start a worker that outlives the hook (own session on
+    POSIX, detached process group on Windows, no inherited stdio).
+  - write_json: atomic JSON write (tmp file + os.replace), so readers see
+    the old or the new content, never a torn file.
+
+Not a hook itself: imported by hook_debounce, atum_journal, atum_scan,
+atum_watch and scripts/context_monitor.py.
+"""
+
+import json
+import os
+import time
+
+
+def acquire_lock(path, stale_seconds):
+    """Create the marker `path`; False while another holder is alive."""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < stale_seconds:
+                    return False
+                os.remove(path)  # Holder died without cleaning up
+            except OSError:
+                return False
+            continue
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+
+
+def release_lock(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def spawn_detached(argv):
+    """Start `argv` in the background, detached from the hook; False if it could not start."""
+    import subprocess  # Deferred: only the call that starts a worker pays for it
+    kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == "nt":
+        kwargs["creationflags"] = 0x00000008 | 0x00000200  # DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen(argv, **kwargs)
+    except OSError:
+        return False
+    return True
+
+
+def write_json(path, data, fsync=False):
+    """Atomically replace `path` with `data` as JSON (parent directory created)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -75,14 +75,15 @@ check_prereqs() {
 # ============================================================
 confirm_install() {
     echo -e "${BOLD}This will install:${NC}"
-    echo "  - 17 hooks       (PreToolUse, PostToolUse, Stop, SessionStart)"
+    echo "  - 16 hooks       (PreToolUse, PostToolUse, Stop, SessionStart)"
+    echo "  - 8 hook helpers (atum_*.py, hook_util.py: modules the hooks import)"
     echo "  - 23 commands     (/scaffold, /security-audit, /tdd, /website, /webmcp, /schedule, etc.)"
     echo "  - 34 agents       (architect, phaser-expert, ml-engineer, geospatial, etc.)"
     echo "  - 29 skills       (pdf, docx, xlsx, DDD, RAG, Mermaid, scheduler, etc.)"
     echo "  - 4 modes         (architect, autonomous, brainstorm, quality)"
     echo "  - 26 rules        (coding-style, security, resilience, decision-principle, etc.)"
     echo "  - 56 plugins      (ECC, code-review, figma, firebase, stripe, linear, etc.)"
-    echo "  - 1 script        (context-monitor.py statusline)"
+    echo "  - 2 scripts       (context-monitor.py statusline + its benchmark, 3 files)"
     echo "  - 184 templates   (scaffolds + references from project-templates)"
     echo "  - settings.json   (hooks, plugins, full autonomy permissions)"
     echo "  - MCP servers     (.claude.json with 14 servers incl. B12, WebMCP, SkillSync)"
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Statusline benchmark for context-monitor.py
+
+Generates synthetic Claude Code transcripts (streamed assistant turns with
+usage, tool_use / tool_result pairs of realistic sizes, system context
+warnings) plus a fake git repository, then times end-to-end renders of
+context-monitor.py in separate processes and records their peak RSS:
+
+    full    --sync render with no cursor state: the whole transcript is read
+    warm    --sync render with a warm cursor after a few turns were appended
+    tail    context_monitor.tail_lines() timed in-process: the bounded read
+            from the end of the transcript that context detection relies on
+    cached  default render served from a fresh render cache
+    floor   an interpreter that only parses the statusline payload (json);
+            the part of every render no script can avoid
+
+Rows are labelled with the size of the transcript as generated (binary
+units), not the requested size. Generated files are kept in --workdir and
+reused between runs.
+
+    python bench-context-monitor.py                       # 1M, 100M, 1G
+    python bench-context-monitor.py --sizes 1M,10M --repeat 3
+    python bench-context-monitor.py --check               # exit 1 on O(transcript) warm/tail/cached renders
+                                                          # or cached renders over budget
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MONITOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "context-monitor.py")
+MODES = ("full", "warm", "tail", "cached")
+FLOOR_COMMAND = [sys.executable, "-c", "import json, sys; json.load(sys.stdin)"]
+TAIL_LINES = 15  # What parse_context_from_transcript() reads
+TAIL_CALLS = 100  # tail_lines() calls per sample: one call is too short to time alone
+# --check: warm/tail/cached latency at the largest size may not exceed this multiple of the smallest size's (+ slack)
+CHECK_FACTOR = 3.0
+CHECK_SLACK_MS = 25.0
+# --check: cached renders at every size may take at most this much longer than the floor
+CHECK_CACHED_MS = 10.0
+
+WORDS = (
+    "the context window fills with tool output when files are read in full and commands print "
+    "long logs so every turn carries more tokens than the last until the session compacts"
+).split()
+
+
+def parse_size(text):
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().rstrip("B")
+    if text[-1:] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_size(size):
+    for unit, suffix in ((1 << 30, "G"), (1 << 20, "M"), (1 << 10, "K")):
+        if size >= unit:
+            return f"{size / unit:.1f}{suffix}"
+    return str(size)
+
+
+def _text(rng, chars):
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+class TranscriptWriter:
+    """Appends realistic transcript entries; one call to turn() is one API round trip."""
+
+    TOOLS = (
+        # (name, input factory, result size range in chars, weight)
+        ("Read", lambda rng, i: {"file_path": f"/repo/src/module_{i % 300}.py"}, (2000, 40000), 5),
+        ("Bash", lambda rng, i: {"command": rng.choice(["npm test", "git status", "pytest -q", "ls -la"])}, (200, 8000), 4),
+        ("Grep", lambda rng, i: {"pattern": rng.choice(WORDS), "path": "/repo"}, (100, 3000), 2),
+        ("Edit", lambda rng, i: {"file_path": f"/repo/src/module_{i % 300}.py"}, (50, 400), 3),
+        ("mcp__github__get_issue", lambda rng, i: {"issue_number": i}, (1000, 6000), 1),
+    )
+
+    def __init__(self, f, seed=0):
+        self.f = f
+        self.written = 0  # Bytes: json.dumps output is ASCII
+        self.rng = random.Random(seed)
+        self.turn_index = 0
+        self.context = 20000
+        self.clock = time.time() - 3600
+        self.payload = _text(self.rng, 45000)  # Sliced for tool results; generating text per line is slow
+
+    def _write(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        self.f.write(line)
+        self.written += len(line)
+
+    def _stamp(self):
+        self.clock += self.rng.uniform(2, 20)
+        return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(self.clock))
+
+    def turn(self):
+        rng, i = self.rng, self.turn_index
+        self.turn_index += 1
+        common = {"sessionId": "bench", "cwd": "/repo", "isSidechain": False}
+        name, make_input, (low, high), _ = rng.choices(self.TOOLS, weights=[t[3] for t in self.TOOLS])[0]
+        result_chars = rng.randint(low, high)
+
+        self.context += result_chars // 4 + rng.randint(200, 1500)
+        if self.context > 170000:
+            self.context = rng.randint(20000, 40000)  # Auto-compact
+            self._write(dict(common, type="system_message", timestamp=self._stamp(),
+                             content="Context left until auto-compact: 0%"))
+        created = rng.randint(500, 4000)
+        usage = {
+            "input_tokens": rng.randint(3, 50),
+            "cache_read_input_tokens": max(0, self.context - created),
+            "cache_creation_input_tokens": created,
+            "output_tokens": rng.randint(50, 1200),
+        }
+        message_id = f"msg_bench_{i:09d}"
+        tool_id = f"toolu_bench_{i:09d}"
+        stamp = self._stamp()
+        # Streaming: one line per content block, each repeating the message's usage
+        blocks = [
+            {"type": "text", "text": _text(rng, rng.randint(40, 600))},
+            {"type": "tool_use", "id": tool_id, "name": name, "input": make_input(rng, i)},
+        ]
+        for block in blocks:
+            self._write(dict(common, type="assistant", timestamp=stamp, message={
+                "id": message_id, "model": "claude-sonnet-4-5", "role": "assistant",
+                "content": [block], "usage": usage,
+            }))
+        start = rng.randint(0, len(self.payload) - result_chars) if result_chars < len(self.payload) else 0
+        self._write(dict(common, type="user", timestamp=self._stamp(), message={
+            "role": "user",
+            "content": [{"type": "tool_result", "tool_use_id": tool_id,
+                         "content": self.payload[start:start + result_chars]}],
+        }))
+        if rng.random() < 0.1:
+            self._write(dict(common, type="user", timestamp=self._stamp(),
+                             message={"role": "user", "content": _text(rng, rng.randint(20, 300))}))
+
+
+def generate_transcript(path, size):
+    """Write (or reuse) a transcript of at least `size` bytes, stopping at the turn that crosses it."""
+    if os.path.exists(path) and os.path.getsize(path) >= size:
+        return
+    started = time.perf_counter()
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        writer = TranscriptWriter(f)
+        while writer.written < size:
+            writer.turn()
+    print(f"  generated {os.path.basename(path)} ({format_size(os.path.getsize(path))}B) "
+          f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def generate_repo(path, files, dirty):
+    """Fake git repository with `files` tracked files, `dirty` of them modified."""
+    marker = os.path.join(path, ".bench-repo")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if f.read() == f"{files} {dirty}":
+                return True
+    if not shutil.which("git"):
+        print("  git not found: renders run without a repository", file=sys.stderr)
+        return False
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    for i in range(files):
+        directory = os.path.join(path, f"pkg{i % 50}", f"sub{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.py"), "w") as f:
+            f.write(f"VALUE = {i}\n")
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com"]
+    subprocess.run(git + ["init", "-q"], cwd=path, check=True)
+    subprocess.run(git + ["add", "-A"], cwd=path, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "bench"], cwd=path, check=True)
+    for i in range(dirty):
+        with open(os.path.join(path, f"pkg{i % 50}", f"sub{i % 7}", f"file{i}.py"), "a") as f:
+            f.write("CHANGED = True\n")
+    with open(marker, "w") as f:
+        f.write(f"{files} {dirty}")
+    return True
+
+
+def run_render(home, transcript, repo, sync, env_extra=None, command=None):
+    """One statusline render in a fresh process: (seconds, peak RSS in bytes or None)."""
+    payload = json.dumps({
+        "model": {"display_name": "Sonnet 4.5"},
+        "workspace": {"current_dir": repo, "project_dir": repo},
+        "transcript_path": transcript,
+        "cost": {"total_cost_usd": 0.42, "total_duration_ms": 600000},
+    }).encode("utf-8")
+    env = dict(os.environ, HOME=home, USERPROFILE=home, **(env_extra or {}))
+    command = command or [sys.executable, MONITOR] + (["--sync"] if sync else [])
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, cwd=repo, env=env)
+    process.stdin.write(payload)
+    process.stdin.close()
+    process.stdout.read()
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status) if hasattr(os, "waitstatus_to_exitcode") else status
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        return elapsed, rss
+    process.wait()
+    return time.perf_counter() - started, None
+
+
+def time_tail(transcript, repeat):
+    """In-process tail_lines() samples: (seconds per call, no RSS)."""
+    sys.path.insert(0, os.path.dirname(MONITOR))
+    from context_monitor import tail_lines
+    tail_lines(transcript, TAIL_LINES)  # Page cache
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(TAIL_CALLS):
+            tail_lines(transcript, TAIL_LINES)
+        samples.append(((time.perf_counter() - started) / TAIL_CALLS, None))
+    return samples
+
+
+def bench_size(workdir, size_label, repo, repeat):
+    """Returns (label of the size generated, {mode: samples})."""
+    transcript = os.path.join(workdir, f"transcript-{size_label}.jsonl")
+    generate_transcript(transcript, parse_size(size_label))
+    label = format_size(os.path.getsize(transcript))
+    home = os.path.join(workdir, f"home-{size_label}")
+    state_dir = os.path.join(home, ".claude", "cache", "context-monitor")
+    results = {}
+
+    samples = []
+    for _ in range(repeat):
+        shutil.rmtree(state_dir, ignore_errors=True)
+        samples.append(run_render(home, transcript, repo, sync=True))
+    results["full"] = samples
+
+    samples = []
+    with open(transcript, "a", encoding="utf-8") as f:
+        writer = TranscriptWriter(f, seed=len(results))
+        for _ in range(repeat):
+            for _ in range(3):
+                writer.turn()
+            f.flush()
+            samples.append(run_render(home, transcript, repo, sync=True))
+    results["warm"] = samples
+
+    results["tail"] = time_tail(transcript, repeat)
+
+    run_render(home, transcript, repo, sync=True)  # Fresh render cache
+    results["cached"] = [
+        run_render(home, transcript, repo, sync=False, env_extra={"CONTEXT_MONITOR_MAX_AGE": "1e9"})
+        for _ in range(repeat)
+    ]
+    return label, results
+
+
+def summarize(results):
+    rows = {}
+    for size_label, modes in results.items():
+        for mode, samples in modes.items():
+            times = [t * 1000 for t, _ in samples]
+            rss = [r for _, r in samples if r is not None]
+            rows[(size_label, mode)] = {
+                "median_ms": statistics.median(times),
+                "max_ms": max(times),
+                "peak_rss_mib": max(rss) / (1 << 20) if rss else None,
+            }
+    return rows
+
+
+def print_table(rows):
+    print(f"{'transcript':>10}  {'mode':<7} {'median':>9} {'max':>9} {'peak RSS':>9}")
+    for (size_label, mode), row in rows.items():
+        rss = f"{row['peak_rss_mib']:.0f} MiB" if row["peak_rss_mib"] is not None else "-"
+        print(f"{size_label:>10}  {mode:<7} {row['median_ms']:>7.2f}ms {row['max_ms']:>7.2f}ms {rss:>9}")
+
+
+def check(rows, sizes):
+    """Warm, tail and cached renders must not grow with the transcript; cached ones stay within budget."""
+    failures = []
+    floor = rows[("-", "floor")]["median_ms"]
+    for size_label in sizes:
+        value = rows[(size_label, "cached")]["median_ms"]
+        if value > floor + CHECK_CACHED_MS:
+            failures.append(
+                f"cached: {value:.1f}ms at {size_label}, budget {floor:.1f}ms floor + {CHECK_CACHED_MS:.0f}ms"
+            )
+    if len(sizes) < 2:
+        return failures
+    smallest, largest = sizes[0], sizes[-1]
+    for mode in ("warm", "tail", "cached"):
+        base = rows[(smallest, mode)]["median_ms"]
+        value = rows[(largest, mode)]["median_ms"]
+        if value > base * CHECK_FACTOR + CHECK_SLACK_MS:
+            failures.append(f"{mode}: {value:.1f}ms at {largest} vs {base:.1f}ms at {smallest}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark context-monitor.py renders.")
+    parser.add_argument("--sizes", default="1M,100M,1G", help="comma-separated transcript sizes (K/M/G)")
+    parser.add_argument("--repeat", type=int, default=5, help="renders per mode and size")
+    parser.add_argument("--git-files", type=int, default=1000, help="tracked files in the fake repository")
+    parser.add_argument("--git-dirty", type=int, default=10, help="modified files in the fake repository")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "context-monitor-bench"))
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if warm/tail/cached renders scale with size or cached renders exceed the budget")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    sizes.sort(key=parse_size)
+    os.makedirs(args.workdir, exist_ok=True)
+    repo = os.path.join(args.workdir, "repo")
+    if not generate_repo(repo, args.git_files, args.git_dirty):
+        os.makedirs(repo, exist_ok=True)
+
+    results = {}
+    run_render(args.workdir, "", repo, sync=False, command=FLOOR_COMMAND)  # Warm the interpreter's files
+    results["-"] = {"floor": [
+        run_render(args.workdir, "", repo, sync=False, command=FLOOR_COMMAND) for _ in range(args.repeat)
+    ]}
+    labels = []
+    for size_label in sizes:
+        print(f"benchmarking {size_label} ...", file=sys.stderr)
+        label, results[label] = bench_size(args.workdir, size_label, repo, args.repeat)
+        labels.append(label)
+
+    rows = summarize(results)
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([dict(size=s, mode=m, **row) for (s, m), row in rows.items()], f, indent=2)
+
+    if args.check:
+        failures = check(rows, labels)
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1121 @@
+#!/usr/bin/env python3
+"""
+Claude Code Context Monitor
+Real-time context usage monitoring with visual indicators and session analytics
+
+Rendering is stale-while-revalidate: main() prints straight from a small
+cache file and, when the cache is older than CONTEXT_MONITOR_MAX_AGE seconds
+(default 2), spawns one detached refresher (`--refresh`) that runs git and
+advances the transcript cursor. Pass --sync (or CONTEXT_MONITOR_SYNC=1) to
+render inline instead.
+
+Every API turn's usage is appended to a per-transcript binary series
+(24 bytes/turn); the ⚡ segment shows the prompt-cache hit ratio over the
+last turns, and `--report [transcript]` prints cache hit ratio, cache
+creation churn and tokens per turn across the session.
+
+The same cursor attributes tool_result payloads to the tool call that
+produced them (tool name + target: file read, Bash command, MCP tool);
+`--tools [transcript]` ranks them by estimated tokens (~4 chars/token).
+
+Context percentages use the window of the running model (CONTEXT_WINDOWS,
+keyed on model.display_name). The per-turn growth of the context is
+smoothed with an exponentially weighted moving average; ⏳ shows the
+estimated number of turns left before auto-compact.
+
+`--watch` is a top-style view of every active session under
+~/.claude/projects: transcripts are tailed through inotify (stat polling
+off Linux) and the same cursor, so each refresh reads only new bytes.
+
+The statusline command runs context-monitor.py, a few-line launcher that
+imports this module: a script is compiled from source on every run, an
+imported module loads from its cached bytecode, and compiling this file
+costs more than the whole cached render.
+"""
+
+import json
+import sys
+import os
+import re
+import time
+
+# Cached renders import only the modules above; hashlib, struct, datetime and
+# subprocess are imported inside the refresher / report functions that use them
+
+ENTRY_POINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "context-monitor.py")
+# hooks/ is a sibling of scripts/ both in this repo and in ~/.claude
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+CACHE_MAX_AGE = float(os.environ.get("CONTEXT_MONITOR_MAX_AGE", "2"))
+REFRESH_LOCK_STALE_SECONDS = 30
+
+
+def _hook_util():
+    """hooks/hook_util.py: lock, detached spawn and atomic JSON write shared with the hooks."""
+    if HOOKS_DIR not in sys.path:
+        sys.path.append(HOOKS_DIR)
+    import hook_util
+
+    return hook_util
+
+
+def get_git_status(cwd=None):
+    """Get git branch and change count for statusline."""
+    import subprocess  # Only the refresher pays for it; cached renders never run git
+
+    try:
+        # Check if inside a git repository
+        subprocess.check_output(
+            ["git", "rev-parse", "--git-dir"], stderr=subprocess.DEVNULL, cwd=cwd
+        )
+
+        # Get current branch
+        branch = (
+            subprocess.check_output(
+                ["git", "branch", "--show-current"], stderr=subprocess.DEVNULL, cwd=cwd
+            )
+            .decode()
+            .strip()
+        )
+
+        if not branch:
+            return ""
+
+        # Count changes
+        changes = (
+            subprocess.check_output(
+                ["git", "status", "--porcelain"], stderr=subprocess.DEVNULL, cwd=cwd
+            )
+            .decode()
+            .splitlines()
+        )
+
+        change_count = len(changes)
+
+        # Color logic
+        if change_count > 0:
+            color = "\033[31m"  # Red = dirty
+            suffix = f" ({change_count})"
+        else:
+            color = "\033[32m"  # Green = clean
+            suffix = ""
+
+        return f" \033[90m|\033[0m {color}🌿 {branch}{suffix}\033[0m"
+
+    except Exception:
+        return ""
+
+
+def tail_lines(path, count, block_size=8192):
+    """Return the last `count` complete lines of a file, reading backwards from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        # One newline more than `count`: the first block read usually starts mid-line
+        while position > 0 and data.count(b"\n") <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+            block_size *= 2  # Grow blocks so very long lines still take few reads
+
+    lines = data.split(b"\n")
+    if position > 0:
+        lines = lines[1:]  # First chunk starts mid-line
+    lines = [line for line in lines if line.strip()]
+    return [line.decode("utf-8", errors="replace") for line in lines[-count:]]
+
+
+# Context window by model.display_name substring, first match wins
+CONTEXT_WINDOWS = {
+    "1M": 1000000,  # "Sonnet 4 (1M context)"
+    "Opus": 200000,
+    "Sonnet": 200000,
+    "Haiku": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 200000
+AUTO_COMPACT_PERCENT = float(os.environ.get("CONTEXT_MONITOR_AUTO_COMPACT_PERCENT", "80"))
+GROWTH_EWMA_ALPHA = 0.3  # Weight of the newest turn in the growth estimate
+# $ per million tokens (input, output, cache read, cache write) by model id prefix, longest
+# match wins. Models listed by id only: a new model is reported as "n/a", not guessed
+MODEL_PRICES = {
+    "claude-opus-4-5": (5, 25, 0.5, 6.25),
+    "claude-opus-4-1": (15, 75, 1.5, 18.75),
+    "claude-opus-4-20250514": (15, 75, 1.5, 18.75),
+    "claude-3-opus": (15, 75, 1.5, 18.75),
+    "claude-sonnet-4-5": (3, 15, 0.3, 3.75),
+    "claude-sonnet-4-20250514": (3, 15, 0.3, 3.75),
+    "claude-3-7-sonnet": (3, 15, 0.3, 3.75),
+    "claude-3-5-sonnet": (3, 15, 0.3, 3.75),
+    "claude-haiku-4-5": (1, 5, 0.1, 1.25),
+    "claude-3-5-haiku": (0.8, 4, 0.08, 1),
+    "claude-3-haiku": (0.25, 1.25, 0.03, 0.3),
+}
+WATCH_INTERVAL = 1.0
+WATCH_ACTIVE_SECONDS = float(os.environ.get("CONTEXT_MONITOR_ACTIVE_SECONDS", "3600"))
+WATCH_GIT_SECONDS = 10
+STATE_DIR = os.path.join(os.path.expanduser("~"), ".claude", "cache", "context-monitor")
+# Per-turn usage series: (timestamp, input, cache_read, cache_creation, output), 24 bytes/turn
+SERIES_FORMAT = "<dIIII"
+CACHE_WINDOW_TURNS = 10
+STATE_VERSION = 1
+CHARS_PER_TOKEN = 4
+MAX_TARGETS_PER_TOOL = 100  # Beyond this, a tool's smallest targets fold into "(other)"
+MAX_PENDING_TOOL_USES = 500
+READ_BLOCK_BYTES = 4 * 1024 * 1024  # Transcript catch-up reads and checkpoints per block
+
+
+def context_window(model_name):
+    """Context window size for a model display name."""
+    for key, window in CONTEXT_WINDOWS.items():
+        if key.lower() in (model_name or "").lower():  # Display names and model ids alike
+            return window
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def apply_context_window(context_info, window):
+    """Recompute a usage-based reading's percentage against the model's window."""
+    if context_info and context_info.get("tokens"):
+        context_info = dict(context_info, percent=min(100, context_info["tokens"] / window * 100))
+    return context_info
+
+
+def context_from_entry(data, window=DEFAULT_CONTEXT_WINDOW):
+    """Context usage carried by one transcript entry, or None."""
+    # Method 1: Parse usage tokens from assistant messages
+    if data.get("type") == "assistant":
+        message = data.get("message", {})
+        usage = message.get("usage", {})
+
+        if usage:
+            input_tokens = usage.get("input_tokens", 0)
+            cache_read = usage.get("cache_read_input_tokens", 0)
+            cache_creation = usage.get("cache_creation_input_tokens", 0)
+
+            # Estimate context usage
+            total_tokens = input_tokens + cache_read + cache_creation
+            if total_tokens > 0:
+                percent_used = min(100, (total_tokens / window) * 100)
+                return {
+                    "percent": percent_used,
+                    "tokens": total_tokens,
+                    "method": "usage",
+                }
+
+    # Method 2: Parse system context warnings
+    elif data.get("type") == "system_message":
+        content = data.get("content", "")
+
+        # "Context left until auto-compact: X%"
+        match = re.search(r"Context left until auto-compact: (\d+)%", content)
+        if match:
+            percent_left = int(match.group(1))
+            return {
+                "percent": 100 - percent_left,
+                "warning": "auto-compact",
+                "method": "system",
+            }
+
+        # "Context low (X% remaining)"
+        match = re.search(r"Context low \((\d+)% remaining\)", content)
+        if match:
+            percent_left = int(match.group(1))
+            return {
+                "percent": 100 - percent_left,
+                "warning": "low",
+                "method": "system",
+            }
+
+    return None
+
+
+def parse_context_from_transcript(transcript_path):
+    """Parse context usage from transcript file."""
+    if not transcript_path or not os.path.exists(transcript_path):
+        return None
+
+    try:
+        # Check last 15 lines for context information
+        recent_lines = tail_lines(transcript_path, 15)
+
+        for line in reversed(recent_lines):
+            try:
+                context_info = context_from_entry(json.loads(line.strip()))
+                if context_info:
+                    return context_info
+            except (json.JSONDecodeError, KeyError, ValueError, AttributeError):
+                continue
+
+        return None
+
+    except (FileNotFoundError, PermissionError):
+        return None
+
+
+def _new_state(stat):
+    return {
+        "version": STATE_VERSION,
+        "offset": 0,
+        "inode": stat.st_ino,
+        "last_message_id": None,
+        "context": None,
+        "totals": {"input": 0, "cache_read": 0, "cache_creation": 0, "output": 0, "turns": 0},
+        "models": {},
+        "series_records": 0,
+        "tools": {},
+        "pending_tool_uses": {},
+        "growth": {"tokens": None, "slope": None},
+        "model": None,
+        "cwd": None,
+        "started_at": None,
+        "last_at": None,
+    }
+
+
+_series_record = None
+
+
+def series_record():
+    """struct.Struct for SERIES_FORMAT, created on first use (cached renders never need it)."""
+    global _series_record
+    if _series_record is None:
+        import struct
+        _series_record = struct.Struct(SERIES_FORMAT)
+    return _series_record
+
+
+def _state_path(transcript_path):
+    import hashlib
+    key = hashlib.sha1(os.path.abspath(transcript_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(STATE_DIR, key + ".json")
+
+
+def _series_path(transcript_path):
+    return _state_path(transcript_path)[: -len(".json")] + ".series"
+
+
+def _entry_time(data):
+    try:
+        from datetime import datetime
+        return datetime.fromisoformat(data["timestamp"].replace("Z", "+00:00")).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        return time.time()
+
+
+def read_series(transcript_path, last=None):
+    """Per-turn usage records, optionally only the `last` N (read from the end)."""
+    try:
+        with open(_series_path(transcript_path), "rb") as f:
+            if last is not None:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - last * series_record().size))
+            data = f.read()
+    except OSError:
+        return []
+    usable = len(data) - len(data) % series_record().size
+    return list(series_record().iter_unpack(data[:usable]))
+
+
+def cache_stats(records):
+    """Hit ratio, cache-creation churn and prompt tokens per turn over usage records."""
+    if not records:
+        return None
+    fresh = sum(r[1] for r in records)
+    read = sum(r[2] for r in records)
+    created = sum(r[3] for r in records)
+    prompt = fresh + read + created
+    if not prompt:
+        return None
+    return {
+        "hit_ratio": read / prompt,
+        "churn": created / prompt,
+        "tokens_per_turn": prompt / len(records),
+        "output_per_turn": sum(r[4] for r in records) / len(records),
+        "turns": len(records),
+    }
+
+
+def _add_usage(state, message):
+    """Fold one API response into the running totals (once per message id)."""
+    usage = message.get("usage") or {}
+    deltas = {
+        "input": usage.get("input_tokens", 0) or 0,
+        "cache_read": usage.get("cache_read_input_tokens", 0) or 0,
+        "cache_creation": usage.get("cache_creation_input_tokens", 0) or 0,
+        "output": usage.get("output_tokens", 0) or 0,
+        "turns": 1,
+    }
+    model = state["models"].setdefault(
+        message.get("model") or "unknown",
+        {"input": 0, "cache_read": 0, "cache_creation": 0, "output": 0, "turns": 0},
+    )
+    for key, value in deltas.items():
+        state["totals"][key] += value
+        model[key] += value
+    return deltas
+
+
+def _add_growth(state, deltas):
+    """EWMA of per-turn context growth; a shrinking context (compaction, /clear) restarts it."""
+    growth = state["growth"]
+    tokens = deltas["input"] + deltas["cache_read"] + deltas["cache_creation"]
+    if not tokens:
+        return
+    previous = growth["tokens"]
+    if previous is None or tokens < previous:
+        growth["slope"] = None
+    elif growth["slope"] is None:
+        growth["slope"] = tokens - previous
+    else:
+        growth["slope"] = GROWTH_EWMA_ALPHA * (tokens - previous) + (1 - GROWTH_EWMA_ALPHA) * growth["slope"]
+    growth["tokens"] = tokens
+
+
+def turns_until_compact(growth, window):
+    """Estimated turns before the context reaches the auto-compact threshold, or None."""
+    if not growth or growth.get("tokens") is None or not growth.get("slope") or growth["slope"] <= 0:
+        return None
+    remaining = window * AUTO_COMPACT_PERCENT / 100 - growth["tokens"]
+    return max(0, int(remaining / growth["slope"]))
+
+
+def tool_target(name, tool_input):
+    """What a tool call was pointed at: file, command, pattern, URL, subagent."""
+    if not isinstance(tool_input, dict):
+        return ""
+    for key in ("file_path", "notebook_path", "path", "url", "pattern", "subagent_type"):
+        if tool_input.get(key):
+            return str(tool_input[key])
+    command = tool_input.get("command")
+    if command:
+        first_line = str(command).strip().splitlines()[0] if str(command).strip() else ""
+        return first_line[:60]
+    return ""
+
+
+def _payload_chars(content):
+    """Size of a tool_result payload as the model sees it (text chars, raw size otherwise)."""
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        total = 0
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "text":
+                total += len(block.get("text") or "")
+            else:
+                total += len(json.dumps(block))
+        return total
+    return len(json.dumps(content)) if content is not None else 0
+
+
+def _note_tool_uses(state, message):
+    pending = state["pending_tool_uses"]
+    for block in message.get("content") or []:
+        if isinstance(block, dict) and block.get("type") == "tool_use" and block.get("id"):
+            name = block.get("name") or "unknown"
+            pending[block["id"]] = [name, tool_target(name, block.get("input"))]
+    while len(pending) > MAX_PENDING_TOOL_USES:
+        del pending[next(iter(pending))]  # Oldest first: results that never came
+
+
+def _add_tool_results(state, message):
+    for block in message.get("content") or []:
+        if not isinstance(block, dict) or block.get("type") != "tool_result":
+            continue
+        name, target = state["pending_tool_uses"].pop(block.get("tool_use_id"), ["unknown", ""])
+        chars = _payload_chars(block.get("content"))
+        tool = state["tools"].setdefault(name, {"calls": 0, "chars": 0, "targets": {}})
+        tool["calls"] += 1
+        tool["chars"] += chars
+        targets = tool["targets"]
+        if target not in targets and len(targets) >= MAX_TARGETS_PER_TOOL:
+            smallest = min((t for t in targets if t != "(other)"), key=lambda t: targets[t][1])
+            other = targets.setdefault("(other)", [0, 0])
+            other[0] += targets[smallest][0]
+            other[1] += targets[smallest][1]
+            del targets[smallest]
+        entry = targets.setdefault(target, [0, 0])
+        entry[0] += 1
+        entry[1] += chars
+
+
+def _apply_lines(state, lines):
+    """Fold complete transcript lines into `state`; returns the new series records."""
+    turns = []
+    for line in lines.split(b"\n"):
+        # Cheap byte test first: most lines (plain user turns, progress) carry none
+        if b'"usage"' not in line and b"system_message" not in line and b'"tool_result"' not in line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        if data.get("cwd"):
+            state["cwd"] = data["cwd"]
+        message = data.get("message")
+        if isinstance(message, dict) and isinstance(message.get("content"), list):
+            if data.get("type") == "assistant":
+                _note_tool_uses(state, message)
+            elif data.get("type") == "user":
+                _add_tool_results(state, message)
+        if data.get("type") == "assistant" and isinstance(message, dict) and message.get("usage"):
+            # Streaming writes one line per content block, all repeating the same usage
+            message_id = message.get("id")
+            if message_id is None or message_id != state["last_message_id"]:
+                deltas = _add_usage(state, message)
+                _add_growth(state, deltas)
+                at = _entry_time(data)
+                state["started_at"] = state["started_at"] or at
+                state["last_at"] = at
+                state["model"] = message.get("model") or state["model"]
+                turns.append(series_record().pack(
+                    at,
+                    *(min(deltas[k], 0xFFFFFFFF) for k in ("input", "cache_read", "cache_creation", "output")),
+                ))
+                state["last_message_id"] = message_id
+        context_info = context_from_entry(data)
+        if context_info:
+            state["context"] = context_info
+    return turns
+
+
+def _save_state(transcript_path, state_file, state, turns):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    # Series first, state second; the record count in the state is the commit point
+    with open(_series_path(transcript_path), "ab") as f:
+        f.truncate(state.get("series_records", 0) * series_record().size)
+        f.write(b"".join(turns))
+    state["series_records"] = state.get("series_records", 0) + len(turns)
+    _hook_util().write_json(state_file, state)
+
+
+def update_transcript_state(transcript_path):
+    """
+    Advance the per-transcript cursor over bytes appended since the last render
+    and return the state: offset, running token totals, per-model totals and
+    the latest context reading. Survives statusline restarts.
+
+    The new bytes are read in READ_BLOCK_BYTES blocks, a partial last line
+    carried into the next block, and the state is checkpointed after every
+    block, so a cold start on a long transcript holds one block in memory
+    and an interrupted catch-up resumes where it stopped.
+    """
+    if not transcript_path or not os.path.exists(transcript_path):
+        return None
+
+    state_file = _state_path(transcript_path)
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+
+    with open(transcript_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if (
+            state is None
+            or state.get("version") != STATE_VERSION
+            or state.get("inode") != stat.st_ino
+            or state.get("offset", 0) > stat.st_size
+        ):
+            state = _new_state(stat)  # New, rotated or truncated transcript
+        f.seek(state["offset"])
+        remaining = stat.st_size - state["offset"]
+        carry = b""
+        while remaining:
+            block = f.read(min(READ_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            block = carry + block
+            # Only complete lines; a line still being written is picked up next time
+            end = block.rfind(b"\n") + 1
+            carry = block[end:]
+            if end:
+                turns = _apply_lines(state, block[:end])
+                state["offset"] += end
+                _save_state(transcript_path, state_file, state, turns)
+    return state
+
+
+def _render_cache_path(transcript_path, cwd):
+    import zlib  # Every cached render computes this: zlib loads in a fraction of hashlib's time
+    data = f"{transcript_path}\0{cwd}".encode("utf-8")
+    return os.path.join(STATE_DIR, f"render-{zlib.crc32(data):08x}{zlib.adler32(data):08x}.json")
+
+
+def load_render_cache(transcript_path, cwd):
+    try:
+        with open(_render_cache_path(transcript_path, cwd), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def refresh_render_cache(transcript_path, cwd):
+    """The slow part of a render (git, transcript cursor), materialized for main()."""
+    try:
+        transcript_state = update_transcript_state(transcript_path)
+    except OSError:
+        transcript_state = None
+    context_info = (transcript_state or {}).get("context") or parse_context_from_transcript(
+        transcript_path
+    )
+    cache = {
+        "updated_at": time.time(),
+        "git_status": get_git_status(cwd or None),
+        "context": context_info,
+        # Only what a cached render shows; tools and pending calls stay in the cursor state
+        "transcript_state": {k: transcript_state[k] for k in ("totals", "growth")} if transcript_state else None,
+        "cache_panel": cache_stats(read_series(transcript_path, CACHE_WINDOW_TURNS)) if transcript_path else None,
+    }
+    _hook_util().write_json(_render_cache_path(transcript_path, cwd), cache)
+    return cache
+
+
+def spawn_refresher(transcript_path, cwd):
+    """Start one detached refresher per (transcript, cwd); no-op while one runs."""
+    hook_util = _hook_util()
+    lock = _render_cache_path(transcript_path, cwd) + ".lock"
+    os.makedirs(STATE_DIR, exist_ok=True)
+    if not hook_util.acquire_lock(lock, REFRESH_LOCK_STALE_SECONDS):
+        return
+    if not hook_util.spawn_detached([sys.executable, ENTRY_POINT, "--refresh", transcript_path or "", cwd or ""]):
+        hook_util.release_lock(lock)
+
+
+def run_refresher(transcript_path, cwd):
+    lock = _render_cache_path(transcript_path, cwd) + ".lock"
+    try:
+        refresh_render_cache(transcript_path, cwd)
+    finally:
+        _hook_util().release_lock(lock)
+
+
+def get_context_display(context_info, turns_left=None):
+    """Generate context display with visual indicators."""
+    if not context_info:
+        return "🔵 ???"
+
+    percent = context_info.get("percent", 0)
+    warning = context_info.get("warning")
+
+    # Color and icon based on usage level
+    if percent >= 95:
+        icon, color = "🚨", "\033[31;1m"  # Blinking red
+        alert = "CRIT"
+    elif percent >= 90:
+        icon, color = "🔴", "\033[31m"  # Red
+        alert = "HIGH"
+    elif percent >= 75:
+        icon, color = "🟠", "\033[91m"  # Light red
+        alert = ""
+    elif percent >= 50:
+        icon, color = "🟡", "\033[33m"  # Yellow
+        alert = ""
+    else:
+        icon, color = "🟢", "\033[32m"  # Green
+        alert = ""
+
+    # Create progress bar
+    segments = 8
+    filled = int((percent / 100) * segments)
+    bar = "█" * filled + "▁" * (segments - filled)
+
+    # Special warnings
+    if warning == "auto-compact":
+        alert = "AUTO-COMPACT!"
+    elif warning == "low":
+        alert = "LOW!"
+
+    reset = "\033[0m"
+    alert_str = f" {alert}" if alert else ""
+
+    # Forecast: turns left before auto-compact at the current growth rate
+    forecast_str = ""
+    if turns_left is not None and not warning:
+        forecast_color = "\033[31m" if turns_left <= 3 else "\033[33m" if turns_left <= 10 else "\033[90m"
+        forecast_str = f" {forecast_color}⏳{turns_left if turns_left < 1000 else '999+'}{reset}"
+
+    return f"{icon}{color}{bar}{reset} {percent:.0f}%{alert_str}{forecast_str}"
+
+
+def get_cache_display(cache_panel):
+    """Prompt-cache segment: hit ratio over the last turns, plus churn when it is high."""
+    if not cache_panel:
+        return ""
+
+    hit = cache_panel["hit_ratio"]
+    if hit >= 0.8:
+        color = "\033[32m"  # Green: context mostly served from cache
+    elif hit >= 0.5:
+        color = "\033[33m"  # Yellow
+    else:
+        color = "\033[31m"  # Red: paying full price for context
+
+    churn = cache_panel["churn"]
+    churn_str = f" ♻{churn * 100:.0f}%" if churn >= 0.2 else ""
+    return f" \033[90m|\033[0m {color}⚡{hit * 100:.0f}%{churn_str}\033[0m"
+
+
+def _latest_transcript():
+    """Most recently written transcript under ~/.claude/projects."""
+    root = os.path.join(os.path.expanduser("~"), ".claude", "projects")
+    latest, latest_mtime = None, 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith(".jsonl"):
+                path = os.path.join(dirpath, name)
+                mtime = os.path.getmtime(path)
+                if mtime > latest_mtime:
+                    latest, latest_mtime = path, mtime
+    return latest
+
+
+def _format_tokens(count):
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.1f}M"
+    if count >= 1_000:
+        return f"{count / 1_000:.1f}k"
+    return str(int(count))
+
+
+def print_report(transcript_path):
+    """--report: prompt-cache efficiency of a session, overall and per window of turns."""
+    from datetime import datetime
+
+    transcript_path = transcript_path or _latest_transcript()
+    if not transcript_path or not os.path.exists(transcript_path):
+        print("No transcript found.")
+        return
+    state = update_transcript_state(transcript_path)
+    series = read_series(transcript_path)
+    print(f"Transcript: {transcript_path}")
+    overall = cache_stats(series)
+    if not overall:
+        print("No usage recorded yet.")
+        return
+
+    totals = state["totals"]
+    print(
+        f"Turns: {totals['turns']}  |  cache hit {overall['hit_ratio'] * 100:.1f}%  |  "
+        f"churn {overall['churn'] * 100:.1f}%  |  {_format_tokens(overall['tokens_per_turn'])} prompt tokens/turn"
+    )
+    print(
+        f"Prompt tokens: {_format_tokens(totals['input'])} fresh, {_format_tokens(totals['cache_read'])} cache read, "
+        f"{_format_tokens(totals['cache_creation'])} cache write  |  output {_format_tokens(totals['output'])}"
+    )
+    for model, usage in sorted(state["models"].items(), key=lambda item: -item[1]["turns"]):
+        prompt = usage["input"] + usage["cache_read"] + usage["cache_creation"]
+        hit = usage["cache_read"] / prompt * 100 if prompt else 0
+        print(f"  {model}: {usage['turns']} turns, cache hit {hit:.1f}%")
+
+    print()
+    print(f"{'turns':>11}  {'started':>8}  {'hit':>6}  {'churn':>6}  {'tok/turn':>9}")
+    for start in range(0, len(series), CACHE_WINDOW_TURNS):
+        window = series[start:start + CACHE_WINDOW_TURNS]
+        stats = cache_stats(window)
+        if not stats:
+            continue
+        flag = "  <- paying full price for context" if stats["hit_ratio"] < 0.5 else ""
+        started = datetime.fromtimestamp(window[0][0]).strftime("%H:%M:%S")
+        print(
+            f"{start + 1:>5}-{start + len(window):<5}  {started:>8}  {stats['hit_ratio'] * 100:>5.1f}%  "
+            f"{stats['churn'] * 100:>5.1f}%  {_format_tokens(stats['tokens_per_turn']):>9}{flag}"
+        )
+
+
+def print_tool_report(transcript_path, top=25):
+    """--tools: rank tool calls by the context their results consumed."""
+    transcript_path = transcript_path or _latest_transcript()
+    if not transcript_path or not os.path.exists(transcript_path):
+        print("No transcript found.")
+        return
+    state = update_transcript_state(transcript_path)
+    tools = state["tools"]
+    total = sum(tool["chars"] for tool in tools.values())
+    print(f"Transcript: {transcript_path}")
+    if not total:
+        print("No tool results recorded yet.")
+        return
+    print(f"Tool results: ~{_format_tokens(total / CHARS_PER_TOKEN)} tokens across "
+          f"{sum(tool['calls'] for tool in tools.values())} calls")
+
+    print()
+    print(f"{'tool':<28} {'calls':>6} {'~tokens':>9} {'share':>6}")
+    for name, tool in sorted(tools.items(), key=lambda item: -item[1]["chars"]):
+        print(f"{name[:28]:<28} {tool['calls']:>6} {_format_tokens(tool['chars'] / CHARS_PER_TOKEN):>9} "
+              f"{tool['chars'] / total * 100:>5.1f}%")
+
+    rows = [
+        (chars, calls, name, target)
+        for name, tool in tools.items()
+        for target, (calls, chars) in tool["targets"].items()
+    ]
+    print()
+    print(f"{'#':>3} {'tool':<20} {'target':<50} {'calls':>6} {'~tokens':>9} {'share':>6}")
+    for rank, (chars, calls, name, target) in enumerate(sorted(rows, reverse=True)[:top], 1):
+        if len(target) > 50:  # Keep the file name of long paths, the head of commands
+            target = "…" + target[-49:] if target.startswith("/") else target[:49] + "…"
+        print(f"{rank:>3} {name[:20]:<20} {target or '-':<50} {calls:>6} "
+              f"{_format_tokens(chars / CHARS_PER_TOKEN):>9} {chars / total * 100:>5.1f}%")
+
+
+def model_prices(model):
+    """MODEL_PRICES entry of the longest prefix of `model`, None for an unknown model."""
+    keys = [key for key in MODEL_PRICES if model.startswith(key)]
+    return MODEL_PRICES[max(keys, key=len)] if keys else None
+
+
+def estimate_cost(models):
+    """API-price estimate of per-model token totals; None if a model that used tokens has no known price."""
+    total = 0.0
+    for model, usage in models.items():
+        if not (usage["input"] or usage["output"] or usage["cache_read"] or usage["cache_creation"]):
+            continue  # No tokens billed, e.g. "<synthetic>" messages
+        prices = model_prices(model)
+        if prices is None:
+            return None
+        total += (
+            usage["input"] * prices[0] + usage["output"] * prices[1]
+            + usage["cache_read"] * prices[2] + usage["cache_creation"] * prices[3]
+        ) / 1_000_000
+    return total
+
+
+class TranscriptEvents:
+    """Transcripts written since the last wait(): inotify on Linux, stat polling elsewhere."""
+
+    IN_MODIFY, IN_MOVED_TO, IN_CREATE = 0x00000002, 0x00000080, 0x00000100
+    IN_Q_OVERFLOW, IN_ISDIR = 0x00004000, 0x40000000
+    def __init__(self, root):
+        import struct
+        self.header = struct.Struct("iIII")  # inotify_event: wd, mask, cookie, len
+        self.root = root
+        self.fd = None
+        self.wd_paths = {}
+        self.stats = {}
+        if sys.platform.startswith("linux"):
+            import ctypes
+            import ctypes.util
+
+            self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = self.libc.inotify_init1(0x00000800 | 0x00080000)  # IN_NONBLOCK | IN_CLOEXEC
+            if fd >= 0:
+                self.fd = fd
+                self._add_watch(root)
+                for entry in os.scandir(root):
+                    if entry.is_dir():
+                        self._add_watch(entry.path)
+
+    def _add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), self.IN_MODIFY | self.IN_MOVED_TO | self.IN_CREATE
+        )
+        if wd >= 0:
+            self.wd_paths[wd] = directory
+
+    def transcripts(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".jsonl"):
+                    yield os.path.join(dirpath, name)
+
+    def _poll(self):
+        changed = set()
+        for path in self.transcripts():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if self.stats.get(path) != (st.st_size, st.st_mtime_ns):
+                self.stats[path] = (st.st_size, st.st_mtime_ns)
+                changed.add(path)
+        return changed
+
+    def wait(self, timeout):
+        if self.fd is None:
+            time.sleep(timeout)
+            return self._poll()
+        import select
+
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + self.header.size <= len(data):
+            wd, mask, _, length = self.header.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + self.header.size: offset + self.header.size + length].split(b"\0", 1)[0])
+            offset += self.header.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                changed |= set(self.transcripts())  # Events dropped: let the cursors sort it out
+                continue
+            directory = self.wd_paths.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & self.IN_ISDIR:
+                if directory == self.root:
+                    self._add_watch(path)  # New project directory
+                    try:
+                        names = os.listdir(path)
+                    except OSError:
+                        continue  # Removed again before we got to it
+                    changed |= {os.path.join(path, n) for n in names if n.endswith(".jsonl")}
+            elif name.endswith(".jsonl"):
+                changed.add(path)
+        return changed
+
+
+def _format_duration(seconds):
+    minutes = int(seconds // 60)
+    return f"{minutes // 60}h{minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m"
+
+
+def render_dashboard(sessions, git_cache):
+    """One screen of the --watch view: a row per active session, newest activity first."""
+    from datetime import datetime
+
+    now = time.time()
+    lines = [
+        f"\033[1mClaude sessions\033[0m  {datetime.now().strftime('%H:%M:%S')}  "
+        f"\033[90m(active within {_format_duration(WATCH_ACTIVE_SECONDS)}, Ctrl-C to quit)\033[0m",
+        "",
+        f"{'session':<28} {'model':<18} {'context':>8} {'⏳':>5} {'~cost':>8} {'time':>6} {'hit':>5}  git",
+    ]
+    rows = sorted(sessions.items(), key=lambda item: -(item[1].get("last_at") or 0))
+    for path, state in rows:
+        cwd = state.get("cwd")
+        name = os.path.basename(cwd) if cwd else os.path.basename(os.path.dirname(path))
+        name = f"{name[:19]}/{os.path.basename(path)[:8]}"
+        model = (state.get("model") or "?").replace("claude-", "")[:18]
+        window = context_window(state.get("model"))
+        context_info = apply_context_window(state.get("context"), window)
+        percent = context_info.get("percent", 0) if context_info else None
+        if percent is None:
+            context = f"{'?':>8}"
+        else:
+            color = "\033[31m" if percent >= 90 else "\033[33m" if percent >= 75 else "\033[32m"
+            context = f"{color}{percent:>7.0f}%\033[0m"
+        turns_left = turns_until_compact(state.get("growth"), window)
+        turns = f"{turns_left if turns_left < 1000 else '999+':>5}" if turns_left is not None else f"{'-':>5}"
+        cost = estimate_cost(state["models"])
+        cost = "n/a" if cost is None else f"${cost:.2f}"
+        started, last = state.get("started_at"), state.get("last_at")
+        duration = _format_duration(last - started) if started and last else "-"
+        panel = cache_stats(read_series(path, CACHE_WINDOW_TURNS))
+        hit = f"{panel['hit_ratio'] * 100:>4.0f}%" if panel else f"{'-':>5}"
+        git = ""
+        if cwd:
+            checked_at, git = git_cache.get(cwd, (0, ""))
+            if now - checked_at > WATCH_GIT_SECONDS:
+                git = get_git_status(cwd if os.path.isdir(cwd) else None).replace(" \033[90m|\033[0m ", "", 1)
+                git_cache[cwd] = (now, git)
+        lines.append(f"{name:<28} {model:<18} {context} {turns} {cost:>8} {duration:>6} {hit}  {git}")
+    if not rows:
+        lines.append("\033[90mNo active sessions.\033[0m")
+    return "\n".join(lines)
+
+
+def watch_sessions():
+    """--watch: refresh the dashboard on every transcript write, at most once per interval."""
+    root = os.path.join(os.path.expanduser("~"), ".claude", "projects")
+    if not os.path.isdir(root):
+        print("No transcripts under ~/.claude/projects.")
+        return
+    events = TranscriptEvents(root)
+    sessions, git_cache = {}, {}
+    dirty = set(events.transcripts())
+    try:
+        while True:
+            now = time.time()
+            for path in dirty:
+                try:
+                    if now - os.path.getmtime(path) <= WATCH_ACTIVE_SECONDS:
+                        sessions[path] = update_transcript_state(path)
+                except OSError:
+                    sessions.pop(path, None)
+            for path in list(sessions):
+                try:
+                    if now - os.path.getmtime(path) > WATCH_ACTIVE_SECONDS:
+                        del sessions[path]
+                except OSError:
+                    del sessions[path]
+            sys.stdout.write("\033[H\033[2J" + render_dashboard(sessions, git_cache) + "\n")
+            sys.stdout.flush()
+            dirty = events.wait(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+
+
+def get_directory_display(workspace_data):
+    """Get directory display name."""
+    current_dir = workspace_data.get("current_dir", "")
+    project_dir = workspace_data.get("project_dir", "")
+
+    if current_dir and project_dir:
+        if current_dir.startswith(project_dir):
+            rel_path = current_dir[len(project_dir) :].lstrip("/")
+            return rel_path or os.path.basename(project_dir)
+        else:
+            return os.path.basename(current_dir)
+    elif project_dir:
+        return os.path.basename(project_dir)
+    elif current_dir:
+        return os.path.basename(current_dir)
+    else:
+        return "unknown"
+
+
+def get_session_metrics(cost_data, transcript_state=None):
+    """Get session metrics display."""
+    if not cost_data and not transcript_state:
+        return ""
+    cost_data = cost_data or {}
+
+    metrics = []
+
+    # Cost
+    cost_usd = cost_data.get("total_cost_usd", 0)
+    if cost_usd > 0:
+        if cost_usd >= 0.10:
+            cost_color = "\033[31m"  # Red for expensive
+        elif cost_usd >= 0.05:
+            cost_color = "\033[33m"  # Yellow for moderate
+        else:
+            cost_color = "\033[32m"  # Green for cheap
+
+        cost_str = f"{cost_usd*100:.0f}¢" if cost_usd < 0.01 else f"${cost_usd:.3f}"
+        metrics.append(f"{cost_color}💰 {cost_str}\033[0m")
+
+    # Duration
+    duration_ms = cost_data.get("total_duration_ms", 0)
+    if duration_ms > 0:
+        minutes = duration_ms / 60000
+        if minutes >= 30:
+            duration_color = "\033[33m"  # Yellow for long sessions
+        else:
+            duration_color = "\033[32m"  # Green
+
+        if minutes < 1:
+            duration_str = f"{duration_ms//1000}s"
+        else:
+            duration_str = f"{minutes:.0f}m"
+
+        metrics.append(f"{duration_color}⏱ {duration_str}\033[0m")
+
+    # Lines changed
+    lines_added = cost_data.get("total_lines_added", 0)
+    lines_removed = cost_data.get("total_lines_removed", 0)
+    if lines_added > 0 or lines_removed > 0:
+        net_lines = lines_added - lines_removed
+
+        if net_lines > 0:
+            lines_color = "\033[32m"  # Green for additions
+        elif net_lines < 0:
+            lines_color = "\033[31m"  # Red for deletions
+        else:
+            lines_color = "\033[33m"  # Yellow for neutral
+
+        sign = "+" if net_lines >= 0 else ""
+        metrics.append(f"{lines_color}📝 {sign}{net_lines}\033[0m")
+
+    # Turns (API responses) from the transcript cursor
+    if transcript_state and transcript_state["totals"]["turns"]:
+        metrics.append(f"\033[36m🔁 {transcript_state['totals']['turns']}\033[0m")
+
+    return f" \033[90m|\033[0m {' '.join(metrics)}" if metrics else ""
+
+
+def main():
+    try:
+        # Read JSON input from Claude Code
+        data = json.load(sys.stdin)
+
+        # Extract information
+        model_name = data.get("model", {}).get("display_name", "Claude")
+        workspace = data.get("workspace", {})
+        transcript_path = data.get("transcript_path", "")
+        cost_data = data.get("cost", {})
+
+        cwd = workspace.get("current_dir") or os.getcwd()
+
+        # Git and transcript parsing: cached (refreshed in background) unless --sync
+        if "--sync" in sys.argv or os.environ.get("CONTEXT_MONITOR_SYNC") == "1":
+            cache = refresh_render_cache(transcript_path, cwd)
+        else:
+            cache = load_render_cache(transcript_path, cwd)
+            if cache is None or time.time() - cache.get("updated_at", 0) > CACHE_MAX_AGE:
+                spawn_refresher(transcript_path, cwd)
+            cache = cache or {}
+        window = context_window(model_name)
+        context_info = apply_context_window(cache.get("context"), window)
+        transcript_state = cache.get("transcript_state")
+        turns_left = turns_until_compact((transcript_state or {}).get("growth"), window)
+
+        # Build status components
+        context_display = get_context_display(context_info, turns_left)
+        directory = get_directory_display(workspace)
+        session_metrics = get_session_metrics(cost_data, transcript_state)
+        git_status = cache.get("git_status", "")
+        cache_display = get_cache_display(cache.get("cache_panel"))
+
+        # Model display with context-aware coloring
+        if context_info:
+            percent = context_info.get("percent", 0)
+            if percent >= 90:
+                model_color = "\033[31m"  # Red
+            elif percent >= 75:
+                model_color = "\033[33m"  # Yellow
+            else:
+                model_color = "\033[32m"  # Green
+
+            model_display = f"{model_color}[{model_name}]\033[0m"
+        else:
+            model_display = f"\033[94m[{model_name}]\033[0m"
+
+        # Combine all components
+        status_line = (
+            f"{model_display} "
+            f"\033[93m📁 {directory}\033[0m"
+            f"{git_status} "
+            f"🧠 {context_display}"
+            f"{cache_display}"
+            f"{session_metrics}"
+        )
+
+        print(status_line)
+
+    except Exception as e:
+        # Fallback display on any error
+        print(
+            f"\033[94m[Claude]\033[0m \033[93m📁 {os.path.basename(os.getcwd())}\033[0m 🧠 \033[31m[Error: {str(e)[:20]}]\033[0m"
+        )
+
+
+def run():
+    """Command-line dispatch shared by context-monitor.py and `python context_monitor.py`."""
+    if "--refresh" in sys.argv:
+        index = sys.argv.index("--refresh")
+        run_refresher(*(sys.argv[index + 1:index + 3] + ["", ""])[:2])
+    elif "--report" in sys.argv:
+        index = sys.argv.index("--report")
+        print_report(sys.argv[index + 1] if len(sys.argv) > index + 1 else None)
+    elif "--tools" in sys.argv:
+        index = sys.argv.index("--tools")
+        print_tool_report(sys.argv[index + 1] if len(sys.argv) > index + 1 else None)
+    elif "--watch" in sys.argv:
+        watch_sessions()
+    else:
+        main()
+
+
+if __name__ == "__main__":
+    run()
@@ -291,7 +291,7 @@ def get_flow_data(conn, flow_id):
     tuples = conn.execute("""
         SELECT id, layer, action, subject, file_ref, props, notes, status, timestamp
         FROM tuples WHERE flow_id = ? AND status != 'deleted'
-        ORDER BY timestamp
+        ORDER BY timestamp, rowid
     """, (flow_id,)).fetchall()
 
     edges = conn.execute("""
@@ -299,11 +299,13 @@ def get_flow_data(conn, flow_id):
         FROM edges e
         JOIN tuples t ON e.from_tuple = t.id
         WHERE t.flow_id = ?
+        ORDER BY t.rowid, e.rowid
     """, (flow_id,)).fetchall()
 
     findings = conn.execute("""
         SELECT id, severity, category, description, tuple_refs, status
         FROM findings WHERE flow_id = ?
+        ORDER BY rowid
     """, (flow_id,)).fetchall()
 
     return {
@@ -314,6 +316,58 @@ def get_flow_data(conn, flow_id):
     }
 
 
+def load_flows_data(conn, session_id=None):
+    """
+    Bulk-load flow data for one session (or every session if None).
+
+    Constant number of queries regardless of flow count, grouped in one
+    pass; each entry has the same shape as get_flow_data().
+    """
+    if session_id is None:
+        flow_filter, params = "", ()
+    else:
+        flow_filter, params = "WHERE session_id = ?", (session_id,)
+    in_flows = f"(SELECT id FROM flows {flow_filter})"
+
+    flows = conn.execute(
+        f"SELECT * FROM flows {flow_filter} ORDER BY session_id, rowid", params
+    ).fetchall()
+    by_flow = {
+        f["id"]: {"flow": dict(f), "tuples": [], "edges": [], "findings": []}
+        for f in flows
+    }
+
+    tuples = conn.execute(f"""
+        SELECT id, layer, action, subject, file_ref, props, notes, status, timestamp,
+               flow_id AS _flow_id
+        FROM tuples WHERE flow_id IN {in_flows} AND status != 'deleted'
+        ORDER BY flow_id, timestamp, rowid
+    """, params)
+
+    edges = conn.execute(f"""
+        SELECT e.from_tuple, e.to_tuple, e.relation, e.condition, e.props,
+               t.flow_id AS _flow_id
+        FROM edges e
+        JOIN tuples t ON e.from_tuple = t.id
+        WHERE t.flow_id IN {in_flows}
+        ORDER BY t.flow_id, t.rowid, e.rowid
+    """, params)
+
+    findings = conn.execute(f"""
+        SELECT id, severity, category, description, tuple_refs, status,
+               flow_id AS _flow_id
+        FROM findings WHERE flow_id IN {in_flows}
+        ORDER BY flow_id, rowid
+    """, params)
+
+    for key, rows in (("tuples", tuples), ("edges", edges), ("findings", findings)):
+        for row in rows:
+            item = dict(row)
+            by_flow[item.pop("_flow_id")][key].append(item)
+
+    return list(by_flow.values())
+
+
 def get_session_data(conn, session_name):
     """Get full session data with all flows."""
     session = conn.execute(
@@ -324,16 +378,7 @@ def get_session_data(conn, session_name):
     if not session:
         return None
 
-    flows = conn.execute(
-        "SELECT id FROM flows WHERE session_id = ?",
-        (session['id'],)
-    ).fetchall()
-
-    flow_data = []
-    for f in flows:
-        fd = get_flow_data(conn, f['id'])
-        if fd:
-            flow_data.append(fd)
+    flow_data = load_flows_data(conn, session['id'])
 
     # Session-level findings (not associated with specific flow)
     session_findings = conn.execute("""
@@ -676,22 +721,13 @@ def cmd_validate(args):
         print(f"Session not found: {args.session}", file=sys.stderr)
         sys.exit(1)
 
-    flows = conn.execute(
-        "SELECT id, name FROM flows WHERE session_id = ?",
-        (session['id'],)
-    ).fetchall()
-
     errors = 0
     warnings = 0
 
-    for flow in flows:
-        flow_data = get_flow_data(conn, flow['id'])
-        if not flow_data:
-            continue
-
+    for flow_data in load_flows_data(conn, session['id']):
         tuples = flow_data["tuples"]
         edges = flow_data["edges"]
-        flow_name = flow['name']
+        flow_name = flow_data["flow"]["name"]
 
         print(f"\n=== Validating: {flow_name} ===")
 
@@ -0,0 +1,24 @@
+"""Shared fixtures: hooks/dependency-checker.py loaded against a throwaway HOME."""
+
+import importlib.util
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOOKS = os.path.join(ROOT, "hooks")
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+
+@pytest.fixture
+def checker(tmp_path, monkeypatch):
+    """A fresh dependency-checker module whose caches and OSV database live under tmp_path."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    monkeypatch.setenv("CLAUDE_OSV_DB", str(tmp_path / "osv.db"))
+    monkeypatch.syspath_prepend(HOOKS)
+    spec = importlib.util.spec_from_file_location(
+        "dependency_checker", os.path.join(HOOKS, "dependency-checker.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
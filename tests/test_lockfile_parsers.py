@@ -0,0 +1,85 @@
+"""
+Streaming lockfile parsers in hooks/dependency-checker.py.
+
+npm lockfiles are checked against the same file parsed whole with
+json.load, including the layouts the line stream hands back to json.load
+(minified, other indentation). pnpm, yarn and Cargo lockfiles in
+tests/fixtures/lockfiles/ are checked against the packages they list.
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES
+
+LOCKFILES = os.path.join(FIXTURES, "lockfiles")
+
+
+def _entries(parser, path):
+    return sorted(set(parser(path)))
+
+
+@pytest.mark.parametrize("version", ["npm-v1", "npm-v2", "npm-v3"])
+def test_npm_stream_matches_json_load(checker, version):
+    path = os.path.join(LOCKFILES, version, "package-lock.json")
+    with open(path, "r", encoding="utf-8") as f:
+        expected = sorted(set(checker._npm_lock_entries(json.load(f))))
+    assert _entries(checker._iter_npm_lock, path) == expected
+    assert ("chalk", "2.4.2", "node_modules/@babel/code-frame/node_modules/chalk") in expected
+    assert not any(name == "local-lib" for name, _, _ in expected)  # Workspace link
+    assert not any(version == "0.0.0" for _, version, _ in expected)  # funding array entry
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+def test_npm_other_layouts_match_json_load(checker, tmp_path, indent):
+    with open(os.path.join(LOCKFILES, "npm-v2", "package-lock.json"), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    path = tmp_path / "package-lock.json"
+    path.write_text(json.dumps(data, indent=indent), encoding="utf-8")
+    assert _entries(checker._iter_npm_lock, str(path)) == sorted(set(checker._npm_lock_entries(data)))
+
+
+def test_npm_unbalanced_layout_falls_back_to_json_load(checker, tmp_path):
+    with open(os.path.join(LOCKFILES, "npm-v3", "package-lock.json"), "r", encoding="utf-8") as f:
+        text = f.read()
+    # An array closed on the line of its last object: brackets no longer match lines
+    balanced = '"https://opencollective.com/b",\n          "version": "0.0.0"\n        }\n      ]'
+    assert balanced in text
+    text = text.replace(balanced, '"https://opencollective.com/b", "version": "0.0.0" } ]')
+    path = tmp_path / "package-lock.json"
+    path.write_text(text, encoding="utf-8")
+    assert _entries(checker._iter_npm_lock, str(path)) == sorted(set(checker._npm_lock_entries(json.loads(text))))
+
+
+@pytest.mark.parametrize("version, expected", [
+    ("pnpm-v6", {("@types/node", "20.8.0"), ("ansi-styles", "4.3.0"), ("chalk", "4.1.2"),
+                 ("color-convert", "2.0.1"), ("react-dom", "18.2.0"), ("supports-color", "7.2.0")}),
+    ("pnpm-v9", {("@types/node", "20.8.0"), ("chalk", "4.1.2"), ("react-dom", "18.2.0"),
+                 ("react", "18.2.0")}),
+])
+def test_pnpm(checker, version, expected):
+    path = os.path.join(LOCKFILES, version, "pnpm-lock.yaml")
+    assert {(name, v) for name, v, _ in checker._iter_pnpm_lock(path)} == expected
+
+
+@pytest.mark.parametrize("flavor, expected", [
+    ("yarn-classic", {("@babel/code-frame", "7.22.13"), ("chalk", "2.4.2"), ("chalk", "4.1.2"),
+                      ("string-width", "4.2.3"), ("supports-color", "7.2.0")}),
+    ("yarn-berry", {("@babel/code-frame", "7.22.13"), ("chalk", "2.4.2"), ("chalk", "4.1.2"),
+                    ("supports-color", "7.2.0")}),
+])
+def test_yarn(checker, flavor, expected):
+    path = os.path.join(LOCKFILES, flavor, "yarn.lock")
+    assert {(name, v) for name, v, _ in checker._iter_yarn_lock(path)} == expected
+
+
+def test_cargo(checker):
+    path = os.path.join(LOCKFILES, "cargo", "Cargo.lock")
+    expected = {("app", "0.1.0"), ("serde", "1.0.190"), ("serde_derive", "1.0.190"),
+                ("time", "0.1.45"), ("time", "0.3.30")}
+    assert {(name, v) for name, v, _ in checker._iter_toml_lock(path)} == expected
+    tomllib = pytest.importorskip("tomllib")
+    with open(path, "rb") as f:
+        assert {(p["name"], p["version"]) for p in tomllib.load(f)["package"]} == expected
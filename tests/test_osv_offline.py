@@ -0,0 +1,93 @@
+"""
+Offline OSV matching in hooks/dependency-checker.py.
+
+The fixture advisories in tests/fixtures/osv/ are imported into a throwaway
+database (the CLAUDE_OSV_DB stand-in); the tests check version_key ordering,
+range / last_affected / exact-version matching and the offline audit of a
+requirements.txt.
+"""
+
+import os
+
+import pytest
+
+from conftest import FIXTURES
+
+
+@pytest.fixture
+def db(checker):
+    database = checker.OsvDatabase()
+    assert database.import_source(os.path.join(FIXTURES, "osv")) == 5  # Withdrawn advisory skipped
+    yield database
+    database.close()
+
+
+def _ids(results, pair):
+    return [v["id"] for v in results[pair]]
+
+
+def test_version_key_ordering(checker):
+    ordered = ["1.0.dev0", "1.0a1", "1.0b2", "1.0rc1", "1.0", "1.0.post1", "1.1"]
+    assert sorted(ordered, key=checker.version_key) == ordered
+    ordered = ["2.0.0-alpha.1", "2.0.0-beta", "2.0.0-rc.1", "2.0.0-rc.2", "2.0.0", "2.0.1"]
+    assert sorted(ordered, key=checker.version_key) == ordered
+    assert checker.version_key("1.0") == checker.version_key("1.0.0") == checker.version_key("v1.0.0+build.5")
+    assert checker.version_key("1.10.0") > checker.version_key("1.9.9")
+
+
+def test_ranges(db):
+    results = db.match("npm", {("lodash", v) for v in ("4.17.20", "4.17.21", "4.18.0", "5.0.0", "6.1.0")})
+    assert _ids(results, ("lodash", "4.17.20")) == ["GHSA-fixture-range"]
+    assert _ids(results, ("lodash", "4.17.21")) == []  # fixed is exclusive
+    assert _ids(results, ("lodash", "4.18.0")) == []
+    assert _ids(results, ("lodash", "5.0.0")) == ["GHSA-fixture-range"]  # Open-ended range
+    assert _ids(results, ("lodash", "6.1.0")) == ["GHSA-fixture-range"]
+    assert results[("lodash", "4.17.20")][0]["severity"] == "HIGH"
+
+
+def test_last_affected(db):
+    results = db.match("PyPI", {("demo-lib", v) for v in ("0.9", "1.0", "1.4", "1.4.0", "1.4.1")})
+    assert _ids(results, ("demo-lib", "0.9")) == []
+    assert _ids(results, ("demo-lib", "1.0")) == ["PYSEC-fixture-last-affected"]
+    assert _ids(results, ("demo-lib", "1.4")) == ["PYSEC-fixture-last-affected"]  # last_affected is inclusive
+    assert _ids(results, ("demo-lib", "1.4.0")) == ["PYSEC-fixture-last-affected"]
+    assert _ids(results, ("demo-lib", "1.4.1")) == []
+
+
+def test_exact_versions(db):
+    results = db.match("PyPI", {("exact-pkg", v) for v in ("2.0.0", "2.0.1", "2.1.0")})
+    assert _ids(results, ("exact-pkg", "2.0.0")) == ["PYSEC-fixture-exact"]
+    assert _ids(results, ("exact-pkg", "2.0.1")) == []
+    assert _ids(results, ("exact-pkg", "2.1.0")) == ["PYSEC-fixture-exact"]
+
+
+def test_prerelease_ordering(db):
+    npm = db.match("npm", {("pre-pkg", v) for v in ("1.9.0", "2.0.0-rc.1", "2.0.0-rc.2", "2.0.0")})
+    pypi = db.match("PyPI", {("pep-pkg", v) for v in ("0.9", "1.0.dev0", "1.0a1", "1.0rc1", "1.0")})
+    assert _ids(npm, ("pre-pkg", "1.9.0")) == ["GHSA-fixture-prerelease"]
+    assert _ids(npm, ("pre-pkg", "2.0.0-rc.1")) == ["GHSA-fixture-prerelease"]
+    assert _ids(npm, ("pre-pkg", "2.0.0-rc.2")) == []
+    assert _ids(npm, ("pre-pkg", "2.0.0")) == []
+    assert _ids(pypi, ("pep-pkg", "0.9")) == []
+    assert _ids(pypi, ("pep-pkg", "1.0.dev0")) == []  # .dev sorts before a1
+    assert _ids(pypi, ("pep-pkg", "1.0a1")) == ["PYSEC-fixture-pep440"]
+    assert _ids(pypi, ("pep-pkg", "1.0rc1")) == ["PYSEC-fixture-pep440"]
+    assert _ids(pypi, ("pep-pkg", "1.0")) == []
+
+
+def test_audit_offline_requirements(checker, db, tmp_path):
+    path = tmp_path / "project" / "requirements.txt"
+    path.parent.mkdir()
+    path.write_text("Demo.Lib==1.2\nexact-pkg==2.0.1\npep-pkg==1.0rc1\n")
+    reason = checker.audit_offline(str(path), "requirements.txt")
+    assert "2 vulnerable package(s)" in reason, reason
+    assert "demo-lib@1.2: PYSEC-fixture-last-affected" in reason
+    assert "pep-pkg@1.0rc1: PYSEC-fixture-pep440" in reason
+    assert "exact-pkg" not in reason
+
+
+def test_audit_offline_leaves_unpinned_sets_to_the_tool(checker, db, tmp_path):
+    path = tmp_path / "project" / "requirements.txt"
+    path.parent.mkdir()
+    path.write_text("demo-lib>=1.0\nexact-pkg\n")
+    assert checker.audit_offline(str(path), "requirements.txt") is None